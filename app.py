@@ -3,8 +3,28 @@ Movie Recommendation System
 Clean, professional interface
 """
 
+import html
+import os
+import sys
+import time
+
+import numpy as np
 import streamlit as st
 
+# Add src to path
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+
+from recommender import HybridRecommender
+
+MODEL_PATH = os.environ.get('RECOMMENDER_MODEL', 'models/hybrid_recommender.pkl')
+SEARCH_LIMIT = 50
+
+SCORE_LABELS = {
+    'similarity_score': 'Similarity',
+    'hybrid_score': 'Hybrid score',
+    'predicted_rating': 'Predicted rating',
+}
+
 # Page configuration
 st.set_page_config(
     page_title="Movie Recommender",
@@ -57,318 +77,88 @@ st.markdown("""
     </style>
     """, unsafe_allow_html=True)
 
-# Complete movie database
-MOVIES_DATA = {
-    'The Dark Knight': {
-        'genre': 'Action',
-        'year': 2008,
-        'rating': 9.0,
-        'recommendations': [
-            {'title': 'Batman Begins', 'score': 0.92, 'genres': 'Action, Crime'},
-            {'title': 'The Dark Knight Rises', 'score': 0.89, 'genres': 'Action, Crime'},
-            {'title': 'Inception', 'score': 0.76, 'genres': 'Action, Sci-Fi'},
-            {'title': 'The Prestige', 'score': 0.71, 'genres': 'Drama, Mystery'},
-            {'title': 'V for Vendetta', 'score': 0.68, 'genres': 'Action, Thriller'},
-            {'title': 'The Matrix', 'score': 0.65, 'genres': 'Sci-Fi, Action'},
-            {'title': 'John Wick', 'score': 0.63, 'genres': 'Action, Thriller'},
-            {'title': 'Mad Max: Fury Road', 'score': 0.60, 'genres': 'Action'},
-        ]
-    },
-    'Inception': {
-        'genre': 'Action',
-        'year': 2010,
-        'rating': 8.8,
-        'recommendations': [
-            {'title': 'Interstellar', 'score': 0.85, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'The Matrix', 'score': 0.81, 'genres': 'Sci-Fi, Action'},
-            {'title': 'The Prestige', 'score': 0.78, 'genres': 'Drama, Mystery'},
-            {'title': 'Shutter Island', 'score': 0.74, 'genres': 'Thriller, Mystery'},
-            {'title': 'The Dark Knight', 'score': 0.72, 'genres': 'Action, Crime'},
-            {'title': 'Memento', 'score': 0.70, 'genres': 'Thriller, Mystery'},
-            {'title': 'Ex Machina', 'score': 0.68, 'genres': 'Sci-Fi, Thriller'},
-        ]
-    },
-    'Mad Max: Fury Road': {
-        'genre': 'Action',
-        'year': 2015,
-        'rating': 8.1,
-        'recommendations': [
-            {'title': 'The Dark Knight', 'score': 0.78, 'genres': 'Action, Crime'},
-            {'title': 'John Wick', 'score': 0.75, 'genres': 'Action, Thriller'},
-            {'title': 'Gladiator', 'score': 0.72, 'genres': 'Action, Drama'},
-            {'title': 'The Matrix', 'score': 0.70, 'genres': 'Sci-Fi, Action'},
-            {'title': '300', 'score': 0.68, 'genres': 'Action, War'},
-        ]
-    },
-    'John Wick': {
-        'genre': 'Action',
-        'year': 2014,
-        'rating': 7.4,
-        'recommendations': [
-            {'title': 'John Wick: Chapter 2', 'score': 0.95, 'genres': 'Action, Thriller'},
-            {'title': 'Mad Max: Fury Road', 'score': 0.80, 'genres': 'Action'},
-            {'title': 'The Dark Knight', 'score': 0.75, 'genres': 'Action, Crime'},
-            {'title': 'The Matrix', 'score': 0.72, 'genres': 'Sci-Fi, Action'},
-            {'title': 'Taken', 'score': 0.70, 'genres': 'Action, Thriller'},
-        ]
-    },
-    'The Matrix': {
-        'genre': 'Action',
-        'year': 1999,
-        'rating': 8.7,
-        'recommendations': [
-            {'title': 'The Matrix Reloaded', 'score': 0.91, 'genres': 'Sci-Fi, Action'},
-            {'title': 'Inception', 'score': 0.84, 'genres': 'Sci-Fi, Action'},
-            {'title': 'Blade Runner', 'score': 0.79, 'genres': 'Sci-Fi, Thriller'},
-            {'title': 'Total Recall', 'score': 0.72, 'genres': 'Sci-Fi, Action'},
-            {'title': 'Minority Report', 'score': 0.71, 'genres': 'Sci-Fi, Thriller'},
-            {'title': 'Ex Machina', 'score': 0.68, 'genres': 'Sci-Fi, Thriller'},
-        ]
-    },
-    'The Shawshank Redemption': {
-        'genre': 'Drama',
-        'year': 1994,
-        'rating': 9.3,
-        'recommendations': [
-            {'title': 'The Green Mile', 'score': 0.88, 'genres': 'Drama'},
-            {'title': 'Forrest Gump', 'score': 0.82, 'genres': 'Drama, Romance'},
-            {'title': 'The Godfather', 'score': 0.79, 'genres': 'Drama, Crime'},
-            {'title': 'Schindler\'s List', 'score': 0.76, 'genres': 'Drama, History'},
-            {'title': 'Good Will Hunting', 'score': 0.73, 'genres': 'Drama'},
-            {'title': 'Fight Club', 'score': 0.70, 'genres': 'Drama, Thriller'},
-        ]
-    },
-    'Forrest Gump': {
-        'genre': 'Drama',
-        'year': 1994,
-        'rating': 8.8,
-        'recommendations': [
-            {'title': 'The Shawshank Redemption', 'score': 0.85, 'genres': 'Drama'},
-            {'title': 'Cast Away', 'score': 0.80, 'genres': 'Drama, Adventure'},
-            {'title': 'Big Fish', 'score': 0.75, 'genres': 'Drama, Fantasy'},
-            {'title': 'The Green Mile', 'score': 0.73, 'genres': 'Drama'},
-            {'title': 'A Beautiful Mind', 'score': 0.70, 'genres': 'Drama'},
-        ]
-    },
-    'The Godfather': {
-        'genre': 'Drama',
-        'year': 1972,
-        'rating': 9.2,
-        'recommendations': [
-            {'title': 'The Godfather Part II', 'score': 0.95, 'genres': 'Drama, Crime'},
-            {'title': 'Goodfellas', 'score': 0.85, 'genres': 'Drama, Crime'},
-            {'title': 'The Shawshank Redemption', 'score': 0.80, 'genres': 'Drama'},
-            {'title': 'Scarface', 'score': 0.78, 'genres': 'Drama, Crime'},
-            {'title': 'Casino', 'score': 0.75, 'genres': 'Drama, Crime'},
-        ]
-    },
-    'Schindler\'s List': {
-        'genre': 'Drama',
-        'year': 1993,
-        'rating': 9.0,
-        'recommendations': [
-            {'title': 'The Pianist', 'score': 0.88, 'genres': 'Drama, History'},
-            {'title': 'Saving Private Ryan', 'score': 0.82, 'genres': 'Drama, War'},
-            {'title': 'The Shawshank Redemption', 'score': 0.78, 'genres': 'Drama'},
-            {'title': 'Life is Beautiful', 'score': 0.76, 'genres': 'Drama, Comedy'},
-            {'title': '12 Years a Slave', 'score': 0.73, 'genres': 'Drama, History'},
-        ]
-    },
-    'Fight Club': {
-        'genre': 'Drama',
-        'year': 1999,
-        'rating': 8.8,
-        'recommendations': [
-            {'title': 'American Psycho', 'score': 0.82, 'genres': 'Drama, Thriller'},
-            {'title': 'Se7en', 'score': 0.80, 'genres': 'Thriller, Crime'},
-            {'title': 'The Prestige', 'score': 0.75, 'genres': 'Drama, Mystery'},
-            {'title': 'Shutter Island', 'score': 0.72, 'genres': 'Thriller, Mystery'},
-            {'title': 'Gone Girl', 'score': 0.70, 'genres': 'Thriller, Drama'},
-        ]
-    },
-    'Interstellar': {
-        'genre': 'Sci-Fi',
-        'year': 2014,
-        'rating': 8.6,
-        'recommendations': [
-            {'title': 'The Martian', 'score': 0.87, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'Gravity', 'score': 0.83, 'genres': 'Sci-Fi, Thriller'},
-            {'title': 'Arrival', 'score': 0.80, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'Inception', 'score': 0.77, 'genres': 'Sci-Fi, Action'},
-            {'title': 'Contact', 'score': 0.74, 'genres': 'Sci-Fi, Drama'},
-            {'title': '2001: A Space Odyssey', 'score': 0.72, 'genres': 'Sci-Fi'},
-        ]
-    },
-    'The Martian': {
-        'genre': 'Sci-Fi',
-        'year': 2015,
-        'rating': 8.0,
-        'recommendations': [
-            {'title': 'Interstellar', 'score': 0.88, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'Gravity', 'score': 0.85, 'genres': 'Sci-Fi, Thriller'},
-            {'title': 'Apollo 13', 'score': 0.80, 'genres': 'Drama, History'},
-            {'title': 'Moon', 'score': 0.75, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'Arrival', 'score': 0.72, 'genres': 'Sci-Fi, Drama'},
-        ]
-    },
-    'Blade Runner 2049': {
-        'genre': 'Sci-Fi',
-        'year': 2017,
-        'rating': 8.0,
-        'recommendations': [
-            {'title': 'Blade Runner', 'score': 0.92, 'genres': 'Sci-Fi, Thriller'},
-            {'title': 'Ex Machina', 'score': 0.85, 'genres': 'Sci-Fi, Thriller'},
-            {'title': 'Ghost in the Shell', 'score': 0.78, 'genres': 'Sci-Fi, Action'},
-            {'title': 'The Matrix', 'score': 0.75, 'genres': 'Sci-Fi, Action'},
-            {'title': 'Her', 'score': 0.72, 'genres': 'Sci-Fi, Drama'},
-        ]
-    },
-    'Ex Machina': {
-        'genre': 'Sci-Fi',
-        'year': 2014,
-        'rating': 7.7,
-        'recommendations': [
-            {'title': 'Blade Runner 2049', 'score': 0.88, 'genres': 'Sci-Fi, Thriller'},
-            {'title': 'Her', 'score': 0.84, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'Arrival', 'score': 0.80, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'Interstellar', 'score': 0.76, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'The Martian', 'score': 0.72, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'Under the Skin', 'score': 0.70, 'genres': 'Sci-Fi, Thriller'},
-        ]
-    },
-    'Arrival': {
-        'genre': 'Sci-Fi',
-        'year': 2016,
-        'rating': 7.9,
-        'recommendations': [
-            {'title': 'Interstellar', 'score': 0.85, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'Ex Machina', 'score': 0.82, 'genres': 'Sci-Fi, Thriller'},
-            {'title': 'Contact', 'score': 0.80, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'The Martian', 'score': 0.75, 'genres': 'Sci-Fi, Drama'},
-            {'title': 'Her', 'score': 0.73, 'genres': 'Sci-Fi, Drama'},
-        ]
-    },
-    'The Grand Budapest Hotel': {
-        'genre': 'Comedy',
-        'year': 2014,
-        'rating': 8.1,
-        'recommendations': [
-            {'title': 'Moonrise Kingdom', 'score': 0.88, 'genres': 'Comedy, Drama'},
-            {'title': 'The Royal Tenenbaums', 'score': 0.85, 'genres': 'Comedy, Drama'},
-            {'title': 'Fantastic Mr. Fox', 'score': 0.80, 'genres': 'Comedy, Adventure'},
-            {'title': 'Amélie', 'score': 0.75, 'genres': 'Comedy, Romance'},
-            {'title': 'The Darjeeling Limited', 'score': 0.72, 'genres': 'Comedy, Drama'},
-        ]
-    },
-    'Superbad': {
-        'genre': 'Comedy',
-        'year': 2007,
-        'rating': 7.6,
-        'recommendations': [
-            {'title': 'The Hangover', 'score': 0.85, 'genres': 'Comedy'},
-            {'title': '21 Jump Street', 'score': 0.80, 'genres': 'Comedy, Action'},
-            {'title': 'Pineapple Express', 'score': 0.78, 'genres': 'Comedy, Action'},
-            {'title': 'Step Brothers', 'score': 0.75, 'genres': 'Comedy'},
-            {'title': 'American Pie', 'score': 0.73, 'genres': 'Comedy'},
-        ]
-    },
-    'The Hangover': {
-        'genre': 'Comedy',
-        'year': 2009,
-        'rating': 7.7,
-        'recommendations': [
-            {'title': 'The Hangover Part II', 'score': 0.90, 'genres': 'Comedy'},
-            {'title': 'Superbad', 'score': 0.82, 'genres': 'Comedy'},
-            {'title': '21 Jump Street', 'score': 0.78, 'genres': 'Comedy, Action'},
-            {'title': 'Wedding Crashers', 'score': 0.75, 'genres': 'Comedy, Romance'},
-            {'title': 'Old School', 'score': 0.72, 'genres': 'Comedy'},
-        ]
-    },
-    'Deadpool': {
-        'genre': 'Comedy',
-        'year': 2016,
-        'rating': 8.0,
-        'recommendations': [
-            {'title': 'Deadpool 2', 'score': 0.92, 'genres': 'Comedy, Action'},
-            {'title': 'Guardians of the Galaxy', 'score': 0.85, 'genres': 'Comedy, Action, Sci-Fi'},
-            {'title': 'Kick-Ass', 'score': 0.78, 'genres': 'Comedy, Action'},
-            {'title': 'The Nice Guys', 'score': 0.75, 'genres': 'Comedy, Action'},
-            {'title': 'Scott Pilgrim vs. the World', 'score': 0.72, 'genres': 'Comedy, Action'},
-        ]
-    },
-    'Guardians of the Galaxy': {
-        'genre': 'Comedy',
-        'year': 2014,
-        'rating': 8.0,
-        'recommendations': [
-            {'title': 'Guardians of the Galaxy Vol. 2', 'score': 0.90, 'genres': 'Comedy, Action, Sci-Fi'},
-            {'title': 'Deadpool', 'score': 0.83, 'genres': 'Comedy, Action'},
-            {'title': 'Thor: Ragnarok', 'score': 0.80, 'genres': 'Comedy, Action'},
-            {'title': 'Ant-Man', 'score': 0.78, 'genres': 'Comedy, Action'},
-            {'title': 'The Avengers', 'score': 0.75, 'genres': 'Action, Sci-Fi'},
-        ]
-    },
-    'Se7en': {
-        'genre': 'Thriller',
-        'year': 1995,
-        'rating': 8.6,
-        'recommendations': [
-            {'title': 'The Silence of the Lambs', 'score': 0.88, 'genres': 'Thriller, Crime'},
-            {'title': 'Zodiac', 'score': 0.85, 'genres': 'Thriller, Crime'},
-            {'title': 'Gone Girl', 'score': 0.80, 'genres': 'Thriller, Drama'},
-            {'title': 'Prisoners', 'score': 0.78, 'genres': 'Thriller, Crime'},
-            {'title': 'Fight Club', 'score': 0.75, 'genres': 'Drama, Thriller'},
-        ]
-    },
-    'The Silence of the Lambs': {
-        'genre': 'Thriller',
-        'year': 1991,
-        'rating': 8.6,
-        'recommendations': [
-            {'title': 'Se7en', 'score': 0.88, 'genres': 'Thriller, Crime'},
-            {'title': 'Zodiac', 'score': 0.82, 'genres': 'Thriller, Crime'},
-            {'title': 'Red Dragon', 'score': 0.80, 'genres': 'Thriller, Crime'},
-            {'title': 'Prisoners', 'score': 0.78, 'genres': 'Thriller, Crime'},
-            {'title': 'Memories of Murder', 'score': 0.75, 'genres': 'Thriller, Crime'},
-        ]
-    },
-    'Gone Girl': {
-        'genre': 'Thriller',
-        'year': 2014,
-        'rating': 8.1,
-        'recommendations': [
-            {'title': 'Shutter Island', 'score': 0.85, 'genres': 'Thriller, Mystery'},
-            {'title': 'The Girl on the Train', 'score': 0.80, 'genres': 'Thriller, Drama'},
-            {'title': 'Prisoners', 'score': 0.78, 'genres': 'Thriller, Crime'},
-            {'title': 'Nocturnal Animals', 'score': 0.75, 'genres': 'Thriller, Drama'},
-            {'title': 'Se7en', 'score': 0.73, 'genres': 'Thriller, Crime'},
-        ]
-    },
-    'Prisoners': {
-        'genre': 'Thriller',
-        'year': 2013,
-        'rating': 8.1,
-        'recommendations': [
-            {'title': 'Gone Girl', 'score': 0.85, 'genres': 'Thriller, Drama'},
-            {'title': 'Se7en', 'score': 0.82, 'genres': 'Thriller, Crime'},
-            {'title': 'Shutter Island', 'score': 0.80, 'genres': 'Thriller, Mystery'},
-            {'title': 'Zodiac', 'score': 0.78, 'genres': 'Thriller, Crime'},
-            {'title': 'The Silence of the Lambs', 'score': 0.75, 'genres': 'Thriller, Crime'},
-        ]
-    },
-    'Shutter Island': {
-        'genre': 'Thriller',
-        'year': 2010,
-        'rating': 8.2,
-        'recommendations': [
-            {'title': 'Inception', 'score': 0.85, 'genres': 'Thriller, Sci-Fi'},
-            {'title': 'Gone Girl', 'score': 0.82, 'genres': 'Thriller, Drama'},
-            {'title': 'The Prestige', 'score': 0.80, 'genres': 'Thriller, Mystery'},
-            {'title': 'Prisoners', 'score': 0.78, 'genres': 'Thriller, Crime'},
-            {'title': 'Mystic River', 'score': 0.75, 'genres': 'Thriller, Drama'},
-        ]
-    },
-}
+# Model and query caches
+# The model is loaded once per process and shared by every session; the
+# file's modification time is part of the key so a retrained model is
+# picked up without restarting the app. max_entries=1 evicts the previous
+# model when that happens.
+@st.cache_resource(max_entries=1, show_spinner="Loading model...")
+def load_recommender(model_path, model_mtime):
+    """Trained model, shared across sessions and reruns"""
+    return HybridRecommender.load_model(model_path)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def load_title_index(model_path, model_mtime):
+    """
+    Sorted lowercase search keys for binary-search prefix lookups
+    
+    Besides every full title, the index holds each title's suffix starting
+    at every later word, so 'knight' finds 'The Dark Knight' without
+    scanning all titles.
+    """
+    titles = load_recommender(model_path, model_mtime).movies_df['title'].astype(str).to_numpy()
+    keys, rows = [], []
+    for row, title in enumerate(np.char.lower(titles.astype(str))):
+        keys.append(title)
+        rows.append(row)
+        for position, char in enumerate(title[:-1]):
+            if char == ' ':
+                keys.append(title[position + 1:])
+                rows.append(row)
+    
+    keys = np.array(keys)
+    order = np.argsort(keys, kind='stable')
+    return titles, keys[order], np.array(rows, dtype=np.int64)[order]
+
+
+@st.cache_data(max_entries=1000, show_spinner=False)
+def search_titles(query, model_path, model_mtime, limit=SEARCH_LIMIT):
+    """Titles containing a word that starts with the query, up to limit"""
+    query = query.strip().lower()
+    if not query:
+        return []
+    
+    titles, keys, rows = load_title_index(model_path, model_mtime)
+    start = np.searchsorted(keys, query, side='left')
+    end = np.searchsorted(keys, query + '\uffff', side='left')
+    
+    # A title can match at several words; keep its first hit and stop
+    # reading the index once limit titles are found
+    matches = {}
+    for row in rows[start:end]:
+        matches.setdefault(int(row), None)
+        if len(matches) == limit:
+            break
+    return [titles[row] for row in matches]
+
+
+@st.cache_data(max_entries=1000, show_spinner=False)
+def get_recommendations(model_path, model_mtime, movie_title, user_id, n_recommendations, diversity):
+    """
+    Recommendations and the model's query latency in milliseconds
+    
+    Cached per input, so repeated queries from any session skip the model.
+    """
+    recommender = load_recommender(model_path, model_mtime)
+    start = time.perf_counter()
+    if user_id:
+        recommendations = recommender.get_hybrid_recommendations(
+            user_id=user_id,
+            movie_title=movie_title,
+            n_recommendations=n_recommendations,
+            diversity=diversity or None
+        )
+    else:
+        recommendations = recommender.get_content_recommendations(
+            movie_title,
+            n_recommendations=n_recommendations * 3 if diversity else n_recommendations
+        )
+        if diversity:
+            recommendations = recommender.diversify(recommendations, n_recommendations, diversity)
+    latency_ms = (time.perf_counter() - start) * 1000
+    return recommendations, latency_ms
+
 
 # Title
 st.title("Movie Recommendation System")
@@ -392,69 +182,91 @@ st.sidebar.markdown("---")
 st.sidebar.markdown("**Author:** Osheen Langer")
 st.sidebar.markdown("[GitHub Repository](https://github.com/OL10/movie-recommender-system)")
 
+if not os.path.exists(MODEL_PATH):
+    st.error(f"No trained model found at '{MODEL_PATH}'. Run `python train.py` first.")
+    st.stop()
+
+model_mtime = os.path.getmtime(MODEL_PATH)
+recommender = load_recommender(MODEL_PATH, model_mtime)
+
 # Main content
 col1, col2 = st.columns([1, 2])
 
 with col1:
     st.subheader("Select Movie")
     
-    # Create sorted movie list
-    all_movies = sorted(MOVIES_DATA.keys())
-    movie_options = [f"{title} ({MOVIES_DATA[title]['year']}) - {MOVIES_DATA[title]['genre']}" 
-                     for title in all_movies]
+    query = st.text_input("Search titles:", placeholder="e.g. dark knight")
+    matches = search_titles(query, MODEL_PATH, model_mtime)
     
-    selected_movie = st.selectbox(
-        "Choose a movie:",
-        options=movie_options
-    )
+    movie_title = None
+    if matches:
+        movie_title = st.selectbox(
+            "Choose a movie:",
+            options=matches
+        )
+    elif query:
+        st.caption("No matching titles")
     
-    movie_title = selected_movie.split(' (')[0]
+    user_id = st.number_input(
+        "User ID (optional, for personalized results):",
+        min_value=0,
+        value=0,
+        step=1
+    )
     
     n_recommendations = st.slider(
         "Number of recommendations:",
-        max_value=5,
-        value=5
+        min_value=1,
+        max_value=20,
+        value=10
+    )
+    
+    diversity = st.slider(
+        "Diversity:",
+        min_value=0.0,
+        max_value=1.0,
+        value=0.0,
+        step=0.1
     )
     
-    get_recs = st.button("Get Recommendations", type="primary")
+    get_recs = st.button("Get Recommendations", type="primary", disabled=movie_title is None)
 
 with col2:
     st.subheader("Recommendations")
     
-    if get_recs:
-        if movie_title in MOVIES_DATA and 'recommendations' in MOVIES_DATA[movie_title]:
-            recommendations = MOVIES_DATA[movie_title]['recommendations'][:n_recommendations]
+    if get_recs and movie_title:
+        start = time.perf_counter()
+        recommendations, latency_ms = get_recommendations(
+            MODEL_PATH, model_mtime, movie_title, int(user_id), n_recommendations, diversity
+        )
+        response_ms = (time.perf_counter() - start) * 1000
+        
+        if not recommendations.empty:
+            score_column = recommendations.columns[-1]
             
             # Success message with proper styling
-            st.markdown(f'<div class="success-message">Found {len(recommendations)} similar movies to {movie_title}</div>', 
+            st.markdown(f'<div class="success-message">Found {len(recommendations)} recommendations for {html.escape(movie_title)}</div>', 
                        unsafe_allow_html=True)
+            st.caption(f"Model query: {latency_ms:.1f} ms | Response (with cache): {response_ms:.1f} ms")
             
             # Display recommendations with proper contrast
-            for idx, movie in enumerate(recommendations, 1):
+            for idx, movie in enumerate(recommendations.itertuples(index=False), 1):
+                movie = movie._asdict()
+                score = movie[score_column]
+                score_text = f"{score:.1%}" if score_column == 'similarity_score' else f"{score:.2f}"
+                genres = html.escape(str(movie.get('genres') or '').replace('|', ', '))
                 st.markdown(f"""
                     <div class="movie-card">
-                        <h3>{idx}. {movie['title']}</h3>
-                        <p><strong>Genres:</strong> {movie['genres']}</p>
-                        <p><strong>Similarity:</strong> {movie['score']:.1%}</p>
+                        <h3>{idx}. {html.escape(str(movie['title']))}</h3>
+                        <p><strong>Genres:</strong> {genres}</p>
+                        <p><strong>{SCORE_LABELS.get(score_column, 'Score')}:</strong> {score_text}</p>
                     </div>
                 """, unsafe_allow_html=True)
         else:
             st.error("Recommendations not available for this movie.")
     else:
-        st.info("Select a movie and click 'Get Recommendations' to see similar films")
-        
-        # Statistics
-        # st.markdown("### Dataset")
-        # st.markdown(f"**Total Movies:** {len(MOVIES_DATA)}")
-        
-        genres = {}
-        for movie_data in MOVIES_DATA.values():
-            genre = movie_data['genre']
-            genres[genre] = genres.get(genre, 0) + 1
-        
-        # st.markdown("**By Genre:**")
-        # for genre, count in sorted(genres.items()):
-        #     st.markdown(f"- {genre}: {count}")
+        st.info("Search for a movie and click 'Get Recommendations' to see similar films")
+        st.markdown(f"**Total Movies:** {len(recommender.movies_df)}")
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,357 @@
+"""
+Benchmark harness for the Hybrid Movie Recommendation System
+
+Measures fit time, peak memory, artifact size, load time and per-query
+latency on seeded synthetic data, and writes a JSON report that can be
+compared across commits.
+
+Usage:
+    python benchmarks/run.py --sizes 100k 1m --output bench.json
+    python benchmarks/run.py compare base.json bench.json
+"""
+
+import argparse
+import json
+import os
+import pickle
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+# Add src to path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(ROOT, 'src'))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from recommender import HybridRecommender
+from instrumentation import peak_rss_bytes, reset_peak_rss
+from synthetic import PRESETS, generate_dataset
+
+
+REPORT_SCHEMA = 1
+
+
+class QuerySampler:
+    """Draws reproducible query inputs from a fitted model"""
+
+    def __init__(self, model, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.all_titles = model.movies_df['title'].to_numpy()
+        self.all_user_ids = np.asarray(model.user_ids)
+
+    def title(self):
+        return self.all_titles[self.rng.integers(len(self.all_titles))]
+
+    def titles(self, k):
+        return list(self.all_titles[self.rng.integers(len(self.all_titles), size=k)])
+
+    def user(self):
+        return int(self.all_user_ids[self.rng.integers(len(self.all_user_ids))])
+
+
+# Query methods timed by the harness: name -> callable(model, sampler)
+QUERIES = {
+    'content': lambda model, sample: model.get_content_recommendations(
+        sample.title(), n_recommendations=10
+    ),
+    'multi_seed': lambda model, sample: model.get_multi_seed_recommendations(
+        sample.titles(20), recency_half_life=5, n_recommendations=10
+    ),
+    'collaborative': lambda model, sample: model.get_collaborative_recommendations(
+        sample.user(), n_recommendations=10
+    ),
+    'hybrid': lambda model, sample: model.get_hybrid_recommendations(
+        user_id=sample.user(), movie_title=sample.title(), n_recommendations=10
+    ),
+    'diverse_hybrid': lambda model, sample: model.get_hybrid_recommendations(
+        user_id=sample.user(), movie_title=sample.title(), n_recommendations=10,
+        diversity=0.3, max_per_genre=3
+    ),
+    'similar_users': lambda model, sample: model.get_similar_users(sample.user(), n_neighbors=10),
+    'coliked_movies': lambda model, sample: model.get_coliked_movies(
+        sample.title(), n_recommendations=10
+    ),
+    'paged_collaborative': lambda model, sample: [
+        page for _, page in zip(range(3), model.iter_collaborative_recommendations(sample.user()))
+    ],
+}
+
+
+def latency_stats(seconds):
+    """Summarize a list of latencies in milliseconds"""
+    ms = np.asarray(seconds) * 1000
+    return {
+        'n': len(ms),
+        'mean_ms': float(ms.mean()),
+        'p50_ms': float(np.percentile(ms, 50)),
+        'p99_ms': float(np.percentile(ms, 99)),
+    }
+
+
+def run_size(size, seed=0, n_queries=200, n_factors=50, svd_method='randomized', data_path=None):
+    """
+    Benchmark one dataset size in the current process
+
+    Args:
+        data_path (str): Pickled (movies, ratings) written by the parent
+            process; generated here if not given, in which case peak memory
+            also covers the generator
+
+    Returns:
+        dict: Dataset, fit, memory, artifact and query measurements
+    """
+    start = time.perf_counter()
+    if data_path is not None:
+        with open(data_path, 'rb') as f:
+            movies, ratings = pickle.load(f)
+    else:
+        movies, ratings = generate_dataset(size, seed=seed)
+    generate_seconds = time.perf_counter() - start
+
+    # Measure the fit's own peak, not the loading or generation before it
+    reset_peak_rss()
+    rss_before_fit = peak_rss_bytes()
+
+    model = HybridRecommender()
+    start = time.perf_counter()
+    model.fit_content_based(movies, features=['genres', 'overview', 'keywords'])
+    content_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    model.fit_collaborative(ratings, n_factors=n_factors, svd_method=svd_method, random_state=seed)
+    collaborative_seconds = time.perf_counter() - start
+    peak_rss = peak_rss_bytes()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'model.pkl')
+        model.save_model(path)
+        artifact_bytes = os.path.getsize(path)
+        start = time.perf_counter()
+        model = HybridRecommender.load_model(path)
+        load_seconds = time.perf_counter() - start
+
+    queries = {}
+    for name, query in QUERIES.items():
+        sampler = QuerySampler(model, seed=seed)
+        query(model, sampler)  # warm up
+        timings = []
+        for _ in range(n_queries):
+            start = time.perf_counter()
+            query(model, sampler)
+            timings.append(time.perf_counter() - start)
+        queries[name] = latency_stats(timings)
+
+    return {
+        'dataset': {
+            'n_ratings': len(ratings),
+            'n_users': int(ratings['userId'].nunique()),
+            'n_movies': len(movies),
+            'generate_seconds': generate_seconds,
+        },
+        'fit': {
+            'content_seconds': content_seconds,
+            'collaborative_seconds': collaborative_seconds,
+            'total_seconds': content_seconds + collaborative_seconds,
+        },
+        'memory': {
+            'rss_before_fit_bytes': rss_before_fit,
+            'peak_rss_bytes': peak_rss,
+        },
+        'artifact': {
+            'size_bytes': artifact_bytes,
+            'load_seconds': load_seconds,
+        },
+        'queries': queries,
+    }
+
+
+def run_isolated(size, args):
+    """
+    Benchmark one size in a fresh interpreter so peak RSS is not shared
+
+    The data is generated here and loaded by the child, so the child's
+    peak RSS covers the data and the fit but not the generator.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        data = generate_dataset(size, seed=args.seed)
+        generate_seconds = time.perf_counter() - start
+        data_path = os.path.join(tmp, 'data.pkl')
+        with open(data_path, 'wb') as f:
+            pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        del data
+
+        result_path = os.path.join(tmp, 'result.json')
+        command = [
+            sys.executable, os.path.abspath(__file__), 'single',
+            '--size', size,
+            '--seed', str(args.seed),
+            '--n-queries', str(args.n_queries),
+            '--n-factors', str(args.n_factors),
+            '--svd-method', args.svd_method,
+            '--result', result_path,
+            '--data', data_path,
+        ]
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+        with open(result_path) as f:
+            result = json.load(f)
+        result['dataset']['generate_seconds'] = generate_seconds
+        return result
+
+
+def git_commit():
+    """Current commit hash, or None outside a git checkout"""
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def flatten(report):
+    """Numeric metrics of a report keyed by 'size.section.metric'"""
+    flat = {}
+    for size, result in report['results'].items():
+        for section in ('fit', 'memory', 'artifact'):
+            for metric, value in result[section].items():
+                # Memory before the fit measures the input data, not the code
+                if metric == 'rss_before_fit_bytes':
+                    continue
+                flat[f"{size}.{section}.{metric}"] = value
+        for name, stats in result['queries'].items():
+            for metric in ('p50_ms', 'p99_ms'):
+                flat[f"{size}.queries.{name}.{metric}"] = stats[metric]
+    return flat
+
+
+def compare(base_path, new_path, threshold=0.1):
+    """
+    Print metric ratios between two reports
+
+    Every metric is lower-is-better, so a ratio above 1 + threshold is
+    flagged as a regression.
+
+    Returns:
+        int: Number of regressions
+    """
+    with open(base_path) as f:
+        base = flatten(json.load(f))
+    with open(new_path) as f:
+        new = flatten(json.load(f))
+
+    regressions = 0
+    print(f"{'metric':<50} {'base':>14} {'new':>14} {'ratio':>8}")
+    for key in sorted(set(base) & set(new)):
+        if base[key] is None or new[key] is None:
+            continue
+        ratio = new[key] / base[key] if base[key] else float('inf') if new[key] else 1.0
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f"{key:<50} {base[key]:>14.4g} {new[key]:>14.4g} {ratio:>8.2f}{flag}")
+    return regressions
+
+
+def parse_args(argv=None):
+    """
+    Parse command line options
+    """
+    argv = list(sys.argv[1:] if argv is None else argv)
+    if not argv or (argv[0] not in ('run', 'single', 'compare') and argv[0] not in ('-h', '--help')):
+        argv.insert(0, 'run')
+
+    parser = argparse.ArgumentParser(description="Benchmark the hybrid recommender")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    def add_run_options(subparser):
+        subparser.add_argument('--seed', type=int, default=0)
+        subparser.add_argument('--n-queries', type=int, default=200,
+                               help="Timed calls per query method")
+        subparser.add_argument('--n-factors', type=int, default=50)
+        subparser.add_argument('--svd-method', default='randomized',
+                               choices=['arpack', 'randomized', 'block_krylov'])
+
+    run_parser = subparsers.add_parser('run', help="Run benchmarks and write a report")
+    run_parser.add_argument('--sizes', nargs='+', default=['100k'], choices=sorted(PRESETS))
+    run_parser.add_argument('--output', default='bench.json', help="Report path")
+    run_parser.add_argument('--in-process', action='store_true',
+                            help="Run all sizes in this process (peak memory is then cumulative)")
+    add_run_options(run_parser)
+
+    single_parser = subparsers.add_parser('single', help=argparse.SUPPRESS)
+    single_parser.add_argument('--size', required=True, choices=sorted(PRESETS))
+    single_parser.add_argument('--result', required=True)
+    single_parser.add_argument('--data', default=None)
+    add_run_options(single_parser)
+
+    compare_parser = subparsers.add_parser('compare', help="Compare two reports")
+    compare_parser.add_argument('base')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument('--threshold', type=float, default=0.1,
+                                help="Relative slowdown reported as a regression")
+
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Command line entry point
+    """
+    args = parse_args(argv)
+
+    if args.command == 'compare':
+        sys.exit(1 if compare(args.base, args.new, args.threshold) else 0)
+
+    if args.command == 'single':
+        result = run_size(args.size, args.seed, args.n_queries, args.n_factors, args.svd_method,
+                          data_path=args.data)
+        with open(args.result, 'w') as f:
+            json.dump(result, f)
+        return
+
+    report = {
+        'schema': REPORT_SCHEMA,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'commit': git_commit(),
+        'environment': {
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'config': {
+            'seed': args.seed,
+            'n_queries': args.n_queries,
+            'n_factors': args.n_factors,
+            'svd_method': args.svd_method,
+        },
+        'results': {},
+    }
+
+    for size in args.sizes:
+        print(f"Benchmarking {size}...")
+        if args.in_process:
+            result = run_size(size, args.seed, args.n_queries, args.n_factors, args.svd_method)
+        else:
+            result = run_isolated(size, args)
+        report['results'][size] = result
+        print(f"  fit {result['fit']['total_seconds']:.1f}s, "
+              f"peak RSS {result['memory']['peak_rss_bytes'] / 2**20:.0f} MB, "
+              f"artifact {result['artifact']['size_bytes'] / 2**20:.1f} MB")
+        for name, stats in result['queries'].items():
+            print(f"  {name:<15} p50 {stats['p50_ms']:.2f} ms  p99 {stats['p99_ms']:.2f} ms")
+
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Report written to '{args.output}'")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Seeded synthetic data generator shaped like MovieLens
+Produces movies.csv/ratings.csv-compatible DataFrames with power-law
+movie popularity and user activity
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Sizes modelled on the public MovieLens releases
+PRESETS = {
+    '100k': {'n_ratings': 100_000, 'n_users': 610, 'n_movies': 9_700},
+    '1m': {'n_ratings': 1_000_000, 'n_users': 6_040, 'n_movies': 3_700},
+    '10m': {'n_ratings': 10_000_000, 'n_users': 69_900, 'n_movies': 10_700},
+    '25m': {'n_ratings': 25_000_000, 'n_users': 162_500, 'n_movies': 59_000},
+}
+
+GENRES = [
+    'Action', 'Adventure', 'Animation', 'Children', 'Comedy', 'Crime',
+    'Documentary', 'Drama', 'Fantasy', 'Film-Noir', 'Horror', 'IMAX',
+    'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Thriller', 'War', 'Western'
+]
+
+MIN_RATINGS_PER_USER = 20
+VOCABULARY_SIZE = 3000
+
+
+def generate_movies(n_movies, seed=0):
+    """
+    Generate movie metadata
+
+    Args:
+        n_movies (int): Number of movies
+        seed (int): Random seed
+
+    Returns:
+        DataFrame: Columns [movieId, title, genres, overview, keywords]
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array([f"w{i}" for i in range(VOCABULARY_SIZE)])
+    # Zipf-like word frequencies, as in natural text
+    word_weights = 1.0 / np.arange(1, VOCABULARY_SIZE + 1)
+    word_weights /= word_weights.sum()
+
+    years = rng.integers(1920, 2024, n_movies)
+    n_genres = rng.integers(1, 4, n_movies)
+    genre_picks = rng.integers(0, len(GENRES), (n_movies, 3))
+    overview_words = rng.choice(VOCABULARY_SIZE, (n_movies, 25), p=word_weights)
+    keyword_words = rng.choice(VOCABULARY_SIZE, (n_movies, 4), p=word_weights)
+
+    genres = [
+        '|'.join(dict.fromkeys(GENRES[g] for g in genre_picks[i, :n_genres[i]]))
+        for i in range(n_movies)
+    ]
+
+    return pd.DataFrame({
+        'movieId': np.arange(1, n_movies + 1),
+        'title': [f"Movie {i + 1} ({years[i]})" for i in range(n_movies)],
+        'genres': genres,
+        'overview': [' '.join(vocabulary[row]) for row in overview_words],
+        'keywords': ['|'.join(vocabulary[row]) for row in keyword_words],
+    })
+
+
+def generate_ratings(n_ratings, n_users, n_movies, seed=0, popularity_exponent=1.0,
+                     activity_sigma=1.2):
+    """
+    Generate ratings with power-law movie popularity and skewed user activity
+
+    Every user gets at least MIN_RATINGS_PER_USER ratings (as in MovieLens)
+    and no (user, movie) pair repeats.
+
+    Args:
+        n_ratings (int): Approximate number of ratings
+        n_users (int): Number of users
+        n_movies (int): Number of movies
+        seed (int): Random seed
+        popularity_exponent (float): Exponent of the movie popularity power law
+        activity_sigma (float): Log-normal spread of ratings per user
+
+    Returns:
+        DataFrame: Columns [userId, movieId, rating, timestamp]
+    """
+    rng = np.random.default_rng(seed)
+
+    # Ratings per user: log-normal activity on top of the guaranteed minimum
+    activity = rng.lognormal(0.0, activity_sigma, n_users)
+    extra = max(n_ratings - MIN_RATINGS_PER_USER * n_users, 0)
+    counts = MIN_RATINGS_PER_USER + np.floor(extra * activity / activity.sum()).astype(np.int64)
+    counts = np.minimum(counts, n_movies)
+
+    # Movie popularity follows a power law over a random ranking
+    popularity = 1.0 / np.arange(1, n_movies + 1) ** popularity_exponent
+    popularity = popularity[rng.permutation(n_movies)]
+    popularity /= popularity.sum()
+
+    user_idx, movie_idx = _sample_pairs(rng, counts, popularity)
+
+    # Rating = movie quality + user bias + noise, on the 0.5-5.0 half-star scale
+    quality = rng.normal(3.5, 0.5, n_movies)
+    bias = rng.normal(0.0, 0.4, n_users)
+    raw = quality[movie_idx] + bias[user_idx] + rng.normal(0.0, 0.8, len(user_idx))
+    rating = np.clip(np.round(raw * 2) / 2, 0.5, 5.0)
+
+    timestamps = rng.integers(789_652_009, 1_700_000_000, len(user_idx))
+
+    return pd.DataFrame({
+        'userId': user_idx + 1,
+        'movieId': movie_idx + 1,
+        'rating': rating.astype(np.float32),
+        'timestamp': timestamps,
+    }).reset_index(drop=True)
+
+
+def _sample_pairs(rng, counts, popularity, n_rounds=20):
+    """
+    Distinct (user, movie) pairs with exactly counts[user] pairs per user
+
+    Pairs are drawn by popularity with some oversampling and repeats are
+    dropped, for up to n_rounds rounds over the users still short of their
+    count. Any users left (heavy users that exhaust the popular movies)
+    are filled by popularity-weighted sampling without replacement from
+    the movies they have not rated.
+
+    Returns:
+        tuple: (user positions, movie positions), sorted by user
+    """
+    n_movies = len(popularity)
+    # Accepted pairs as sorted user * n_movies + movie codes
+    accepted = np.zeros(0, dtype=np.int64)
+    missing = counts.copy()
+
+    for _ in range(n_rounds):
+        if not missing.any():
+            break
+        draw = np.ceil(missing * 1.3).astype(np.int64)
+        codes = np.repeat(np.arange(len(counts), dtype=np.int64) * n_movies, draw)
+        codes += rng.choice(n_movies, len(codes), p=popularity)
+
+        # Drop repeats within the draw (keeping draw order) and accepted pairs
+        _, first = np.unique(codes, return_index=True)
+        codes = codes[np.sort(first)]
+        positions = np.minimum(np.searchsorted(accepted, codes), max(len(accepted) - 1, 0))
+        if len(accepted):
+            codes = codes[accepted[positions] != codes]
+
+        # Trim every user to what is still missing (codes are grouped by user)
+        users = codes // n_movies
+        starts = np.searchsorted(users, users)
+        codes = codes[np.arange(len(codes)) - starts < missing[users]]
+
+        missing -= np.bincount(codes // n_movies, minlength=len(counts))
+        # Stable sort merges the two sorted runs in linear time
+        accepted = np.sort(np.concatenate([accepted, np.sort(codes)]), kind='stable')
+
+    extra = []
+    for user in np.flatnonzero(missing):
+        low, high = np.searchsorted(accepted, [user * n_movies, (user + 1) * n_movies])
+        # Exponential keys give weighted sampling without replacement
+        keys = rng.exponential(size=n_movies) / popularity
+        keys[accepted[low:high] - user * n_movies] = np.inf
+        extra.append(user * n_movies + np.argpartition(keys, missing[user] - 1)[:missing[user]])
+
+    if extra:
+        accepted = np.sort(np.concatenate([accepted] + extra))
+    return accepted // n_movies, accepted % n_movies
+
+
+def generate_dataset(size='100k', seed=0):
+    """
+    Generate a movies/ratings pair for a preset size
+
+    Args:
+        size (str): One of PRESETS
+        seed (int): Random seed
+
+    Returns:
+        tuple: (movies, ratings) DataFrames
+    """
+    if size not in PRESETS:
+        raise ValueError(f"Unknown size '{size}'. Choose from {sorted(PRESETS)}.")
+    preset = PRESETS[size]
+    movies = generate_movies(preset['n_movies'], seed=seed)
+    ratings = generate_ratings(
+        preset['n_ratings'], preset['n_users'], preset['n_movies'], seed=seed + 1
+    )
+    return movies, ratings
@@ -0,0 +1,242 @@
+"""
+Truncated SVD backends for the collaborative filtering model
+Supports ARPACK (exact), randomized range finding and block-Krylov iteration
+"""
+
+import time
+import numpy as np
+from scipy.sparse.linalg import LinearOperator, svds
+
+
+SVD_METHODS = ('arpack', 'randomized', 'block_krylov')
+
+
+class _BudgetExceeded(Exception):
+    """Raised internally to abort an ARPACK run that ran out of time"""
+
+
+def centered_operator(matrix, row_means):
+    """
+    Wrap a (sparse) matrix as the implicit operator ``matrix - row_means * 1^T``
+
+    The centered ratings matrix is dense even when the raw ratings are
+    sparse, so it is never materialized.
+
+    Args:
+        matrix: Sparse or dense matrix of shape (n_rows, n_cols)
+        row_means (ndarray): Value subtracted from every entry of each row
+
+    Returns:
+        LinearOperator: Operator supporting products with vectors and blocks
+    """
+    row_means = np.asarray(row_means, dtype=matrix.dtype)
+    n_cols = matrix.shape[1]
+
+    def matmat(X):
+        X = X.reshape(n_cols, -1)
+        return matrix @ X - np.outer(row_means, X.sum(axis=0))
+
+    def rmatmat(Y):
+        Y = Y.reshape(len(row_means), -1)
+        return matrix.T @ Y - np.ones((n_cols, 1), dtype=matrix.dtype) * (row_means @ Y)
+
+    return LinearOperator(
+        matrix.shape,
+        matvec=lambda x: matmat(x).ravel(),
+        rmatvec=lambda y: rmatmat(y).ravel(),
+        matmat=matmat,
+        rmatmat=rmatmat,
+        dtype=matrix.dtype
+    )
+
+
+def centered_frobenius_norm(matrix, row_means):
+    """
+    Frobenius norm of ``matrix - row_means * 1^T`` without densifying it
+    """
+    row_means = np.asarray(row_means, dtype=np.float64)
+    squared = matrix.multiply(matrix).sum() if hasattr(matrix, 'multiply') else np.sum(matrix ** 2)
+    row_sums = np.asarray(matrix.sum(axis=1)).ravel()
+    squared = squared - 2 * row_means @ row_sums + matrix.shape[1] * row_means @ row_means
+    return float(np.sqrt(max(squared, 0.0)))
+
+
+def _orthonormalize(block):
+    Q, _ = np.linalg.qr(block)
+    return Q
+
+
+def truncated_svd(operator, k, method='arpack', oversamples=10, n_iter=4,
+                  time_budget=None, callback=None, random_state=None,
+                  frobenius_norm=None, init=None):
+    """
+    Compute the top-k singular triplets of a matrix or linear operator
+
+    Args:
+        operator: Matrix or LinearOperator to decompose
+        k (int): Number of singular values/vectors to keep
+        method (str): One of 'arpack', 'randomized' or 'block_krylov'
+        oversamples (int): Extra columns in the sketch for randomized methods
+        n_iter (int): Power (randomized) or Krylov (block_krylov) iterations
+        time_budget (float): Wall-clock budget in seconds; iteration stops early
+            once it is spent and the best factorization so far is returned
+        callback (callable): Called with a progress dict after every iteration
+        random_state (int): Seed for the random test matrix
+        frobenius_norm (float): Norm of the operator, used to report the
+            relative reconstruction error
+        init (ndarray): Approximate right singular vectors of shape
+            (n_cols, m) from a previous fit; seeds the randomized backends
+            so they converge in fewer iterations (ignored by ARPACK)
+
+    Returns:
+        tuple: (U, sigma, Vt, info) with singular values in descending order
+    """
+    if method not in SVD_METHODS:
+        raise ValueError(f"Unknown SVD method '{method}'. Choose from {SVD_METHODS}.")
+
+    start = time.perf_counter()
+    deadline = start + time_budget if time_budget is not None else None
+    info = {
+        'method': method,
+        'k': k,
+        'iterations': 0,
+        'timed_out': False,
+        'fallback': None,
+        'fallback_iterations': 0
+    }
+
+    def reporter(key, method_name):
+        def report(iteration, total):
+            info[key] = iteration
+            if callback is not None:
+                callback({
+                    'method': method_name,
+                    'iteration': iteration,
+                    'n_iter': total,
+                    'elapsed': time.perf_counter() - start
+                })
+        return report
+
+    report = reporter('iterations', method)
+
+    def out_of_time():
+        return deadline is not None and time.perf_counter() > deadline
+
+    if method == 'arpack':
+        try:
+            U, sigma, Vt = _arpack(operator, k, report, out_of_time, random_state)
+        except _BudgetExceeded:
+            # ARPACK cannot return a partial result, so finish with a single
+            # randomized pass which costs two products with the matrix; its
+            # progress is counted separately so the ARPACK count is kept
+            info['timed_out'] = True
+            info['fallback'] = 'randomized'
+            U, sigma, Vt = _randomized(operator, k, oversamples, 0,
+                                       reporter('fallback_iterations', 'randomized'),
+                                       lambda: True, random_state, init)
+    elif method == 'randomized':
+        U, sigma, Vt = _randomized(operator, k, oversamples, n_iter, report,
+                                   out_of_time, random_state, init)
+    else:
+        U, sigma, Vt = _block_krylov(operator, k, oversamples, n_iter, report,
+                                     out_of_time, random_state, init)
+
+    if out_of_time():
+        info['timed_out'] = True
+    info['elapsed'] = time.perf_counter() - start
+    info['reconstruction_error'] = reconstruction_error(sigma, frobenius_norm)
+
+    return U, sigma, Vt, info
+
+
+def reconstruction_error(sigma, frobenius_norm):
+    """
+    Relative Frobenius error ||A - U S Vt|| / ||A|| of a truncated SVD
+
+    U S Vt is the projection of A onto the span of U, so the residual
+    follows from the singular values alone.
+    """
+    if frobenius_norm is None:
+        return None
+    if frobenius_norm == 0:
+        return 0.0
+    residual = frobenius_norm ** 2 - float(np.sum(np.square(sigma, dtype=np.float64)))
+    return float(np.sqrt(max(residual, 0.0)) / frobenius_norm)
+
+
+def _arpack(operator, k, report, out_of_time, random_state):
+    n_products = [0]
+
+    def guarded(product):
+        def wrapped(x):
+            if out_of_time():
+                raise _BudgetExceeded()
+            n_products[0] += 1
+            report(n_products[0], None)
+            return product(x)
+        return wrapped
+
+    shape = operator.shape
+    dtype = np.dtype(operator.dtype)
+    if isinstance(operator, LinearOperator):
+        forward, backward = operator.matvec, operator.rmatvec
+    else:
+        forward, backward = (lambda x: operator @ x), (lambda y: operator.T @ y)
+    guarded_operator = LinearOperator(
+        shape, matvec=guarded(forward), rmatvec=guarded(backward), dtype=dtype
+    )
+
+    U, sigma, Vt = svds(guarded_operator, k=k, random_state=random_state)
+    order = np.argsort(sigma)[::-1]
+    return U[:, order], sigma[order], Vt[order]
+
+
+def _sketch(operator, k, oversamples, random_state, init=None):
+    n_rows, n_cols = operator.shape
+    size = min(k + oversamples, n_rows, n_cols)
+    rng = np.random.default_rng(random_state)
+    omega = rng.standard_normal((n_cols, size)).astype(operator.dtype, copy=False)
+    if init is not None:
+        # Start from the previous subspace; the remaining random columns
+        # still pick up directions that appeared since
+        n_init = min(init.shape[1], size)
+        omega[:, :n_init] = init[:, :n_init]
+    return _orthonormalize(operator @ omega)
+
+
+def _project(operator, Q, k):
+    # B = Q^T A, computed as (A^T Q)^T so only right products are needed
+    B = (operator.T @ Q).T
+    Ub, sigma, Vt = np.linalg.svd(B, full_matrices=False)
+    return Q @ Ub[:, :k], sigma[:k], Vt[:k]
+
+
+def _randomized(operator, k, oversamples, n_iter, report, out_of_time, random_state,
+                init=None):
+    Q = _sketch(operator, k, oversamples, random_state, init)
+    report(0, n_iter)
+
+    for iteration in range(1, n_iter + 1):
+        if out_of_time():
+            break
+        Q = _orthonormalize(operator.T @ Q)
+        Q = _orthonormalize(operator @ Q)
+        report(iteration, n_iter)
+
+    return _project(operator, Q, k)
+
+
+def _block_krylov(operator, k, oversamples, n_iter, report, out_of_time, random_state,
+                  init=None):
+    Q = _sketch(operator, k, oversamples, random_state, init)
+    blocks = [Q]
+    report(0, n_iter)
+
+    for iteration in range(1, n_iter + 1):
+        if out_of_time():
+            break
+        Q = _orthonormalize(operator @ _orthonormalize(operator.T @ Q))
+        blocks.append(Q)
+        report(iteration, n_iter)
+
+    return _project(operator, _orthonormalize(np.hstack(blocks)), k)
@@ -0,0 +1,101 @@
+"""
+Diversity reranking of candidate sets
+Maximal marginal relevance (MMR) with optional per-genre quotas, using
+vectorized incremental max-similarity updates
+"""
+
+import numpy as np
+
+
+def genre_matrix(genres, separator='|'):
+    """
+    Boolean genre indicator matrix
+
+    Args:
+        genres (iterable): Genre strings such as 'Action|Comedy'
+        separator (str): Separator between genres
+
+    Returns:
+        tuple: (matrix of shape (n_items, n_genres), list of genre names)
+    """
+    names = {}
+    rows, columns = [], []
+    for row, value in enumerate(genres):
+        if not isinstance(value, str):
+            continue
+        for genre in value.split(separator):
+            genre = genre.strip()
+            if genre:
+                rows.append(row)
+                columns.append(names.setdefault(genre, len(names)))
+
+    matrix = np.zeros((len(genres), len(names)), dtype=bool)
+    matrix[rows, columns] = True
+    return matrix, list(names)
+
+
+def mmr_rerank(relevance, vectors, k, diversity=0.3, genres=None, max_per_genre=None):
+    """
+    Select k candidates by maximal marginal relevance
+
+    Each step picks the candidate maximizing
+    (1 - diversity) * relevance - diversity * max_similarity_to_selected,
+    then folds the picked candidate's similarities into the running maximum
+    with one matrix-vector product, so the cost is k products over the
+    candidates rather than a full pairwise similarity matrix.
+
+    Args:
+        relevance (ndarray): Relevance score per candidate (min-max normalized here)
+        vectors: L2-normalized candidate vectors, dense ndarray or sparse CSR
+        k (int): Number of candidates to select
+        diversity (float): 0 ranks by relevance only, 1 by novelty only
+        genres (ndarray): Boolean (n_candidates, n_genres) indicator matrix
+        max_per_genre (int): Maximum selected candidates sharing any genre;
+            fewer than k are returned if the quota runs out of candidates
+
+    Returns:
+        ndarray: Positions of the selected candidates in selection order
+    """
+    relevance = np.asarray(relevance, dtype=np.float64)
+    n = len(relevance)
+    k = min(k, n)
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+
+    spread = relevance.max() - relevance.min()
+    relevance = (relevance - relevance.min()) / spread if spread > 0 else np.zeros(n)
+    gain = (1 - diversity) * relevance
+
+    use_quota = genres is not None and max_per_genre is not None
+    if use_quota:
+        genre_counts = np.zeros(genres.shape[1], dtype=np.int64)
+
+    max_similarity = np.zeros(n)
+    available = np.ones(n, dtype=bool)
+    selected = np.empty(k, dtype=np.int64)
+    n_selected = 0
+
+    for _ in range(k):
+        score = gain - diversity * max_similarity
+        score[~available] = -np.inf
+        pick = int(np.argmax(score))
+        if not available[pick]:
+            break
+
+        selected[n_selected] = pick
+        n_selected += 1
+        available[pick] = False
+
+        if diversity > 0:
+            picked = vectors[pick]
+            if hasattr(picked, 'toarray'):
+                picked = picked.toarray().ravel()
+            np.maximum(max_similarity, vectors @ picked, out=max_similarity)
+
+        if use_quota:
+            genre_counts += genres[pick]
+            full = genre_counts >= max_per_genre
+            if full[genres[pick]].any():
+                available &= ~genres[:, full].any(axis=1)
+
+    return selected[:n_selected]
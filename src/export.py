@@ -0,0 +1,187 @@
+"""
+Offline export of top-N collaborative recommendations for every user
+Writes a compact on-disk store with an O(1) read API for serving
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+
+STORE_VERSION = 1
+
+# Working memory per scored (user, movie) pair: the float32 score plus the
+# int64 argpartition result
+BYTES_PER_SCORE = 12
+
+
+def export_top_n(recommender, directory, n=50, block_size=2048, n_workers=None,
+                 memory_budget=512 * 2**20):
+    """
+    Compute the top-N unrated movies for every user and write them to disk
+
+    Users are scored in blocks with one matrix product per block; blocks run
+    in a thread pool since the BLAS product releases the GIL. The store holds
+    fixed-width arrays plus an offset index:
+
+        users.int64    user IDs, one per row
+        offsets.int64  start of each user's slice (n_users + 1 entries)
+        items.int32    recommended movie IDs, best first
+        scores.float32 predicted ratings aligned with items.int32
+        meta.json      written last; marks the export as complete
+
+    Args:
+        recommender: Trained HybridRecommender instance
+        directory (str): Output directory (created if missing)
+        n (int): Number of recommendations per user
+        block_size (int): Maximum users scored per matrix product
+        n_workers (int): Worker threads (defaults to the CPU count)
+        memory_budget (int): Bytes of score blocks in flight across all
+            workers; blocks are shrunk below block_size to stay within it
+
+    Returns:
+        dict: Export metadata
+    """
+    if recommender.user_factors is None:
+        raise ValueError("Collaborative model not fitted. Call fit_collaborative first.")
+
+    os.makedirs(directory, exist_ok=True)
+    meta_path = os.path.join(directory, 'meta.json')
+    if os.path.exists(meta_path):
+        os.remove(meta_path)
+
+    rating_matrix = recommender.rating_matrix.tocsr()
+    n_users, n_movies = rating_matrix.shape
+    movie_ids = np.asarray(recommender.movie_ids).astype(np.int32)
+
+    # Users with fewer than n unrated movies get shorter slices
+    counts = np.minimum(n, n_movies - np.diff(rating_matrix.indptr))
+    offsets = np.zeros(n_users + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    total = int(offsets[-1])
+
+    np.asarray(recommender.user_ids, dtype=np.int64).tofile(os.path.join(directory, 'users.int64'))
+    offsets.tofile(os.path.join(directory, 'offsets.int64'))
+    items = _open_array(directory, 'items.int32', np.int32, total)
+    scores = _open_array(directory, 'scores.float32', np.float32, total)
+
+    item_factors_t = np.ascontiguousarray(recommender.item_factors.T)
+
+    n_workers = n_workers or os.cpu_count() or 1
+    rows_in_budget = memory_budget // (n_workers * BYTES_PER_SCORE * max(n_movies, 1))
+    block_size = max(1, min(block_size, rows_in_budget))
+
+    def score_block(start):
+        stop = min(start + block_size, n_users)
+        block = recommender.user_factors[start:stop] @ item_factors_t
+        block += recommender.user_ratings_mean[start:stop, None]
+
+        # Mask already rated movies
+        rated = rating_matrix[start:stop]
+        block[np.repeat(np.arange(stop - start), np.diff(rated.indptr)), rated.indices] = -np.inf
+
+        # Negate in place rather than allocating a negated copy
+        width = min(n, n_movies)
+        np.negative(block, out=block)
+        top = np.argpartition(block, width - 1, axis=1)[:, :width]
+        top_scores = np.take_along_axis(block, top, axis=1)
+        order = np.argsort(top_scores, axis=1, kind='stable')
+        top = np.take_along_axis(top, order, axis=1)
+        top_scores = -np.take_along_axis(top_scores, order, axis=1)
+
+        for row in range(stop - start):
+            begin, end = offsets[start + row], offsets[start + row + 1]
+            items[begin:end] = movie_ids[top[row, :end - begin]]
+            scores[begin:end] = top_scores[row, :end - begin]
+
+    if total > 0 and n_movies > 0:
+        with ThreadPoolExecutor(max_workers=n_workers) as pool:
+            list(pool.map(score_block, range(0, n_users, block_size)))
+
+    items.flush()
+    scores.flush()
+    del items, scores
+
+    meta = {
+        'version': STORE_VERSION,
+        'n': n,
+        'n_users': int(n_users),
+        'n_entries': total
+    }
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    return meta
+
+
+def _open_array(directory, name, dtype, length):
+    path = os.path.join(directory, name)
+    if length == 0:
+        open(path, 'wb').close()
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='w+', shape=(length,))
+
+
+class TopNStore:
+    """
+    Read-only view of an export written by export_top_n
+
+    Arrays are memory-mapped, so opening is cheap and pages are shared
+    between processes serving from the same export.
+    """
+
+    def __init__(self, directory):
+        """
+        Open an export directory
+
+        Args:
+            directory (str): Directory written by export_top_n
+        """
+        meta_path = os.path.join(directory, 'meta.json')
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"No complete top-N export found in '{directory}'")
+
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != STORE_VERSION:
+            raise ValueError(f"Unsupported top-N export version {self.meta['version']}")
+
+        self.user_ids = np.fromfile(os.path.join(directory, 'users.int64'), dtype=np.int64)
+        self.offsets = np.fromfile(os.path.join(directory, 'offsets.int64'), dtype=np.int64)
+        self.items = self._map(directory, 'items.int32', np.int32)
+        self.scores = self._map(directory, 'scores.float32', np.float32)
+        self.user_index = {user_id: row for row, user_id in enumerate(self.user_ids.tolist())}
+
+    @staticmethod
+    def _map(directory, name, dtype):
+        path = os.path.join(directory, name)
+        if os.path.getsize(path) == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(path, dtype=dtype, mode='r')
+
+    def __len__(self):
+        return len(self.user_ids)
+
+    def __contains__(self, user_id):
+        return user_id in self.user_index
+
+    def get(self, user_id, n=None):
+        """
+        Precomputed recommendations for a user
+
+        Args:
+            user_id (int): User ID
+            n (int): Return at most n recommendations (defaults to all stored)
+
+        Returns:
+            tuple: (movie IDs, predicted ratings) arrays, or None for unknown users
+        """
+        row = self.user_index.get(user_id)
+        if row is None:
+            return None
+        begin, end = self.offsets[row], self.offsets[row + 1]
+        if n is not None:
+            end = min(end, begin + n)
+        return self.items[begin:end], self.scores[begin:end]
@@ -0,0 +1,314 @@
+"""
+Lightweight hot-path instrumentation for the recommender
+Per-stage timers, call counters, memory high-water marks and an opt-in
+sampling profiler, exportable as JSON or Prometheus text
+"""
+
+import json
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class _NullStage:
+    """Shared no-op context manager returned while instrumentation is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    """Times one execution of a named stage"""
+
+    __slots__ = ('metrics', 'name', 'start', 'memory_start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        if self.metrics.track_memory:
+            self.memory_start = self.metrics._push_memory_frame()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        memory_peak = None
+        if self.metrics.track_memory:
+            memory_peak = self.metrics._pop_memory_frame() - self.memory_start
+        self.metrics._record(self.name, elapsed, memory_peak)
+        return False
+
+
+class Instrumentation:
+    """
+    Collects per-stage timings and counters
+
+    While disabled, stage() returns a shared no-op context manager and
+    count() returns immediately, so instrumented code pays one attribute
+    check per call.
+    """
+
+    def __init__(self, enabled=False, track_memory=False):
+        """
+        Initialize the collector
+
+        Args:
+            enabled (bool): Start collecting immediately
+            track_memory (bool): Track per-stage Python heap peaks with tracemalloc
+                (adds noticeable overhead, so off by default)
+        """
+        self.enabled = False
+        self.track_memory = False
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._profiler = None
+        self.reset()
+        if enabled:
+            self.enable(track_memory=track_memory)
+
+    def enable(self, track_memory=False):
+        """Start collecting metrics"""
+        self.track_memory = track_memory
+        if track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.enabled = True
+
+    def disable(self):
+        """Stop collecting metrics (collected values are kept)"""
+        self.enabled = False
+        if self.track_memory and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self.track_memory = False
+
+    def reset(self):
+        """Clear all collected metrics"""
+        with self._lock:
+            self.stages = {}
+            self.counters = Counter()
+
+    def stage(self, name):
+        """
+        Context manager timing a named stage
+
+        Example:
+            with metrics.stage('fit_collab.svd'):
+                ...
+        """
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def count(self, name, value=1):
+        """Increment a named counter"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] += value
+
+    def _record(self, name, elapsed, memory_peak):
+        with self._lock:
+            stats = self.stages.get(name)
+            if stats is None:
+                stats = self.stages[name] = {
+                    'count': 0,
+                    'total_seconds': 0.0,
+                    'max_seconds': 0.0,
+                    'memory_peak_bytes': None
+                }
+            stats['count'] += 1
+            stats['total_seconds'] += elapsed
+            stats['max_seconds'] = max(stats['max_seconds'], elapsed)
+            if memory_peak is not None:
+                stats['memory_peak_bytes'] = max(stats['memory_peak_bytes'] or 0, memory_peak)
+
+    def _push_memory_frame(self):
+        # tracemalloc has a single peak counter, so before a nested stage
+        # resets it the peak so far is folded into the enclosing stage
+        stack = getattr(self._local, 'memory_stack', None)
+        if stack is None:
+            stack = self._local.memory_stack = []
+        current, peak = tracemalloc.get_traced_memory()
+        if stack:
+            stack[-1] = max(stack[-1], peak)
+        stack.append(0)
+        tracemalloc.reset_peak()
+        return current
+
+    def _pop_memory_frame(self):
+        stack = self._local.memory_stack
+        _, peak = tracemalloc.get_traced_memory()
+        peak = max(peak, stack.pop())
+        if stack:
+            stack[-1] = max(stack[-1], peak)
+        return peak
+
+    def snapshot(self):
+        """
+        Current metrics as a plain dict
+
+        Returns:
+            dict: Stage statistics, counters and the process memory high-water mark
+        """
+        with self._lock:
+            stages = {name: dict(stats) for name, stats in self.stages.items()}
+            counters = dict(self.counters)
+        for stats in stages.values():
+            stats['mean_seconds'] = stats['total_seconds'] / stats['count']
+        return {
+            'stages': stages,
+            'counters': counters,
+            'max_rss_bytes': max_rss_bytes()
+        }
+
+    def to_json(self, indent=2):
+        """Metrics as a JSON document"""
+        return json.dumps(self.snapshot(), indent=indent, sort_keys=True)
+
+    def to_prometheus(self, prefix='recommender'):
+        """Metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for labels, value in samples:
+                lines.append(f"{prefix}_{name}{labels} {value}")
+
+        stages = sorted(snapshot['stages'].items())
+        metric('stage_calls_total', 'counter', "Number of times a stage ran",
+               [(f'{{stage="{name}"}}', stats['count']) for name, stats in stages])
+        metric('stage_seconds_total', 'counter', "Total time spent in a stage",
+               [(f'{{stage="{name}"}}', repr(stats['total_seconds'])) for name, stats in stages])
+        metric('stage_seconds_max', 'gauge', "Slowest single run of a stage",
+               [(f'{{stage="{name}"}}', repr(stats['max_seconds'])) for name, stats in stages])
+        memory = [(name, stats) for name, stats in stages if stats['memory_peak_bytes'] is not None]
+        if memory:
+            metric('stage_memory_peak_bytes', 'gauge', "Python heap high-water mark of a stage",
+                   [(f'{{stage="{name}"}}', stats['memory_peak_bytes']) for name, stats in memory])
+        if snapshot['counters']:
+            metric('events_total', 'counter', "Named event counters",
+                   [(f'{{name="{name}"}}', value)
+                    for name, value in sorted(snapshot['counters'].items())])
+        if snapshot['max_rss_bytes'] is not None:
+            metric('process_max_rss_bytes', 'gauge', "Process resident memory high-water mark",
+                   [('', snapshot['max_rss_bytes'])])
+
+        return '\n'.join(lines) + '\n'
+
+    def start_profiler(self, interval=0.005, thread_id=None):
+        """
+        Start sampling call stacks in a background thread
+
+        Args:
+            interval (float): Seconds between samples
+            thread_id (int): Thread to sample (defaults to the calling thread)
+        """
+        if self._profiler is not None:
+            raise ValueError("Profiler already running. Call stop_profiler first.")
+        self._profiler = SamplingProfiler(
+            interval, thread_id if thread_id is not None else threading.get_ident()
+        )
+        self._profiler.start()
+
+    def stop_profiler(self):
+        """
+        Stop the sampling profiler
+
+        Returns:
+            Counter: Sample counts keyed by collapsed stack ("outer;...;inner"),
+            the input format of flamegraph tools
+        """
+        if self._profiler is None:
+            return Counter()
+        profiler, self._profiler = self._profiler, None
+        profiler.stop()
+        return profiler.samples
+
+
+class SamplingProfiler(threading.Thread):
+    """Periodically records the call stack of one thread"""
+
+    def __init__(self, interval, thread_id):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.thread_id = thread_id
+        self.samples = Counter()
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{frame.f_lineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def max_rss_bytes():
+    """Process resident memory high-water mark, or None if unavailable"""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return rss if sys.platform == 'darwin' else rss * 1024
+
+
+
+def peak_rss_bytes():
+    """
+    Resident memory high-water mark of the current process image
+
+    On Linux this is VmHWM, which unlike ru_maxrss is neither inherited
+    from the parent process nor kept across exec, and can be restarted
+    with reset_peak_rss. Elsewhere it falls back to max_rss_bytes.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return max_rss_bytes()
+
+
+def reset_peak_rss():
+    """
+    Restart the high-water mark reported by peak_rss_bytes (Linux only)
+
+    Returns:
+        bool: True if the mark was reset
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+# Shared collector used by the recommender; disabled until enable() is called
+metrics = Instrumentation()
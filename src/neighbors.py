@@ -0,0 +1,154 @@
+"""
+Nearest-neighbor indexes over learned factor matrices
+Rows are stored L2-normalized as contiguous float32, so an exact query is
+a single matrix-vector product and a batch query a single matrix product
+"""
+
+import numpy as np
+
+
+def _top_k_rows(scores, k):
+    """Column positions of the k highest scores per row, best first"""
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.zeros((scores.shape[0], 0), dtype=np.int64)
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind='stable')
+    return np.take_along_axis(top, order, axis=1)
+
+
+class NeighborIndex:
+    """
+    Top-k cosine neighbors among the rows of a factor matrix
+
+    Exact search scores every row. With ann=True an inverted-file index
+    (spherical k-means clusters) restricts each query to the rows of the
+    n_probe clusters closest to it, trading a little recall for speed on
+    large matrices.
+    """
+
+    def __init__(self, vectors, ann=False, n_clusters=None, n_probe=32, n_iter=10,
+                 block_size=1024, random_state=0):
+        """
+        Build the index
+
+        Args:
+            vectors (ndarray): One row per user or item
+            ann (bool): Build the clustered index for approximate queries
+            n_clusters (int): Clusters for the ANN index (defaults to sqrt(n_rows))
+            n_probe (int): Clusters scanned per approximate query
+            n_iter (int): k-means iterations
+            block_size (int): Query rows scored per matrix product in batch queries
+            random_state (int): Seed for the k-means initialization
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = np.ascontiguousarray(vectors / np.maximum(norms, 1e-12))
+        self.block_size = block_size
+        self.ann = ann
+        self.n_probe = n_probe
+
+        if ann:
+            n_clusters = n_clusters or max(int(np.sqrt(len(self.vectors))), 1)
+            self._build_clusters(min(n_clusters, len(self.vectors)), n_iter, random_state)
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def _assign(self, vectors):
+        """Nearest centroid of every row, in blocks to bound memory"""
+        assignment = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), 16384):
+            block = vectors[start:start + 16384]
+            assignment[start:start + len(block)] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignment
+
+    def _build_clusters(self, n_clusters, n_iter, random_state):
+        rng = np.random.default_rng(random_state)
+        self.centroids = self.vectors[rng.choice(len(self.vectors), n_clusters, replace=False)].copy()
+
+        for _ in range(n_iter):
+            assignment = self._assign(self.vectors)
+            order = np.argsort(assignment, kind='stable')
+            clusters, starts = np.unique(assignment[order], return_index=True)
+            # Empty clusters keep their previous centroid
+            sums = np.add.reduceat(self.vectors[order], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            self.centroids[clusters] = sums / np.maximum(norms, 1e-12)
+
+        assignment = self._assign(self.vectors)
+        self._order = np.argsort(assignment, kind='stable')
+        self._offsets = np.searchsorted(assignment[self._order], np.arange(n_clusters + 1))
+
+    def _candidates(self, vector):
+        """Rows of the n_probe clusters closest to vector"""
+        n_probe = min(self.n_probe, len(self.centroids))
+        closest = np.argpartition(-(self.centroids @ vector), n_probe - 1)[:n_probe]
+        return np.concatenate([
+            self._order[self._offsets[cluster]:self._offsets[cluster + 1]] for cluster in closest
+        ])
+
+    def query(self, row, k=10, exact=False):
+        """
+        Nearest neighbors of one row, excluding the row itself
+
+        Args:
+            row (int): Row to query
+            k (int): Number of neighbors
+            exact (bool): Score every row even if the ANN index is built
+
+        Returns:
+            tuple: (neighbor rows, cosine similarities), best first
+        """
+        vector = self.vectors[row]
+        if self.ann and not exact:
+            candidates = self._candidates(vector)
+            candidates = candidates[candidates != row]
+            scores = self.vectors[candidates] @ vector
+        else:
+            candidates = None
+            scores = self.vectors @ vector
+            scores[row] = -np.inf
+
+        top = _top_k_rows(scores[np.newaxis], k)[0]
+        top = top[np.isfinite(scores[top])]
+        rows = top if candidates is None else candidates[top]
+        return rows, scores[top]
+
+    def query_batch(self, rows, k=10, exact=False):
+        """
+        Nearest neighbors of several rows
+
+        Exact queries score block_size rows per matrix product.
+
+        Args:
+            rows (array-like): Rows to query
+            k (int): Number of neighbors per row
+            exact (bool): Score every row even if the ANN index is built
+
+        Returns:
+            tuple: (neighbor rows, cosine similarities), arrays of shape
+            (len(rows), k) with the best neighbor first
+        """
+        rows = np.asarray(rows, dtype=np.int64)
+        k = min(k, len(self.vectors) - 1)
+        if self.ann and not exact:
+            results = [self.query(row, k) for row in rows]
+            # Clusters can hold fewer than k candidates; pad with -1 / -inf
+            neighbors = np.full((len(rows), k), -1, dtype=np.int64)
+            scores = np.full((len(rows), k), -np.inf, dtype=np.float32)
+            for i, (found, similarity) in enumerate(results):
+                neighbors[i, :len(found)] = found
+                scores[i, :len(found)] = similarity
+            return neighbors, scores
+
+        neighbors = np.empty((len(rows), max(k, 0)), dtype=np.int64)
+        scores = np.empty((len(rows), max(k, 0)), dtype=np.float32)
+        for start in range(0, len(rows), self.block_size):
+            block = rows[start:start + self.block_size]
+            block_scores = self.vectors[block] @ self.vectors.T
+            block_scores[np.arange(len(block)), block] = -np.inf
+            top = _top_k_rows(block_scores, k)
+            neighbors[start:start + len(block)] = top
+            scores[start:start + len(block)] = np.take_along_axis(block_scores, top, axis=1)
+        return neighbors, scores
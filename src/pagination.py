@@ -0,0 +1,157 @@
+"""
+Lazily ranked, paginated recommendation results
+Scores are computed once per query; pages are produced by incremental
+partial selection, and server-side cursors keep results between requests
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+
+class RankedResults:
+    """
+    Pages over a score vector, ranked only as far as requested
+
+    Each extension partitions just the candidates not ranked yet, and
+    extensions grow geometrically, so reading page p costs about as much
+    as selecting the top (p + 1) * page_size once.
+    """
+
+    def __init__(self, scores, build_page, page_size=10):
+        """
+        Initialize the results
+
+        Args:
+            scores (ndarray): Score per candidate; -inf marks excluded candidates
+            build_page (callable): Turns (positions, scores) into a result page
+            page_size (int): Results per page
+        """
+        self.scores = scores
+        self.build_page = build_page
+        self.page_size = page_size
+        self._remaining = np.flatnonzero(np.isfinite(scores))
+        self._ranked = np.zeros(0, dtype=np.int64)
+        self._lock = threading.Lock()
+        self.total = len(self._remaining)
+
+    @property
+    def n_pages(self):
+        """Number of non-empty pages"""
+        return -(-self.total // self.page_size)
+
+    def _extend(self, n):
+        needed = n - len(self._ranked)
+        if needed <= 0 or len(self._remaining) == 0:
+            return
+
+        take = min(max(needed, len(self._ranked)), len(self._remaining))
+        if take < len(self._remaining):
+            order = np.argpartition(-self.scores[self._remaining], take - 1)
+            chosen = self._remaining[order[:take]]
+            self._remaining = self._remaining[order[take:]]
+        else:
+            chosen = self._remaining
+            self._remaining = self._remaining[:0]
+
+        chosen = chosen[np.argsort(-self.scores[chosen], kind='stable')]
+        self._ranked = np.concatenate([self._ranked, chosen])
+
+    def top(self, n):
+        """Positions of the n best candidates, best first"""
+        with self._lock:
+            self._extend(n)
+            return self._ranked[:n]
+
+    def page(self, number):
+        """
+        One page of results
+
+        Args:
+            number (int): Zero-based page number
+
+        Returns:
+            The page built by build_page (empty past the last page)
+        """
+        start = number * self.page_size
+        with self._lock:
+            self._extend(start + self.page_size)
+            positions = self._ranked[start:start + self.page_size]
+        return self.build_page(positions, self.scores[positions])
+
+    def __iter__(self):
+        for number in range(self.n_pages):
+            yield self.page(number)
+
+
+class CursorStore:
+    """
+    Short-lived server-side cursors over RankedResults
+
+    Cursors expire ttl seconds after their last use; the least recently
+    used cursors are evicted beyond max_cursors.
+    """
+
+    def __init__(self, ttl=300.0, max_cursors=1024):
+        """
+        Initialize the store
+
+        Args:
+            ttl (float): Seconds a cursor stays alive after its last use
+            max_cursors (int): Maximum number of live cursors
+        """
+        self.ttl = ttl
+        self.max_cursors = max_cursors
+        self._cursors = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._cursors)
+
+    def open(self, results):
+        """
+        Register results and return a cursor ID
+        """
+        cursor_id = uuid.uuid4().hex
+        with self._lock:
+            self._expire()
+            self._cursors[cursor_id] = (results, time.monotonic() + self.ttl)
+            while len(self._cursors) > self.max_cursors:
+                self._cursors.popitem(last=False)
+        return cursor_id
+
+    def get(self, cursor_id):
+        """
+        Results of a live cursor
+
+        Raises:
+            KeyError: If the cursor is unknown or expired
+        """
+        with self._lock:
+            self._expire()
+            if cursor_id not in self._cursors:
+                raise KeyError(f"Cursor '{cursor_id}' not found or expired")
+            results, _ = self._cursors.pop(cursor_id)
+            self._cursors[cursor_id] = (results, time.monotonic() + self.ttl)
+        return results
+
+    def page(self, cursor_id, number):
+        """One page from a live cursor"""
+        return self.get(cursor_id).page(number)
+
+    def close(self, cursor_id):
+        """Drop a cursor"""
+        with self._lock:
+            self._cursors.pop(cursor_id, None)
+
+    def _expire(self):
+        now = time.monotonic()
+        # Entries are kept in last-use order, so expired ones are at the front
+        while self._cursors:
+            cursor_id, (_, expires) = next(iter(self._cursors.items()))
+            if expires > now:
+                break
+            del self._cursors[cursor_id]
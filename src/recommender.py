@@ -5,12 +5,18 @@ Combines Content-Based Filtering (TF-IDF) and Collaborative Filtering (SVD)
 
 import pandas as pd
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
-from scipy.sparse.linalg import svds
+from scipy.sparse import csr_matrix, vstack
+import os
 import pickle
-import warnings
-warnings.filterwarnings('ignore')
+import time
+
+from instrumentation import metrics
+from pagination import RankedResults
+from diversity import genre_matrix, mmr_rerank
+from neighbors import NeighborIndex
+
+# sklearn and scipy.sparse.linalg are only needed for fitting and are
+# imported inside the fit methods to keep imports cheap for serving
 
 
 class HybridRecommender:
@@ -33,25 +39,55 @@ class HybridRecommender:
         self.tfidf_matrix = None
         self.tfidf_vectorizer = None
         self.movies_df = None
+        self.title_index = None
         self.ratings_df = None
-        self.user_movie_matrix = None
-        self.svd_predictions = None
+        self.rating_matrix = None
+        self.user_ids = None
+        self.movie_ids = None
+        self.user_index = None
+        self.movie_index = None
+        self.user_ratings_mean = None
+        self.user_factors = None
+        self.item_factors = None
+        self.sigma = None
+        self.svd_info = None
+        self.user_neighbors = None
+        self.item_neighbors = None
+        self.data_watermark = None
+        self._catalog_columns = None
+        self._catalog_genres = None
         
-    def fit_content_based(self, movies_df, features=['genres', 'overview', 'keywords']):
+    def fit_content_based(self, movies_df, features=['genres', 'overview', 'keywords'],
+                          init_model=None):
         """
         Fit content-based model using TF-IDF
         
         Args:
             movies_df (DataFrame): Movie metadata with features
             features (list): Column names to use for content features
+            init_model (HybridRecommender): Previously trained model whose vocabulary
+                is reused; only new or changed movies are vectorized
         """
-        self.movies_df = movies_df.copy()
+        self.movies_df = movies_df.reset_index(drop=True)
+        self._catalog_columns = None
+        self._catalog_genres = None
+        self._build_title_index()
         
         # Combine features into single text column
-        self.movies_df['combined_features'] = ''
-        for feature in features:
-            if feature in self.movies_df.columns:
-                self.movies_df['combined_features'] += self.movies_df[feature].fillna('') + ' '
+        with metrics.stage('fit_content.features'):
+            self.movies_df['combined_features'] = ''
+            for feature in features:
+                if feature in self.movies_df.columns:
+                    self.movies_df['combined_features'] += self.movies_df[feature].fillna('') + ' '
+        
+        if init_model is not None and init_model.tfidf_vectorizer is not None:
+            self.tfidf_vectorizer = init_model.tfidf_vectorizer
+            with metrics.stage('fit_content.tfidf'):
+                self.tfidf_matrix = self._warm_tfidf_matrix(init_model)
+            print(f"Content-based model fitted with {self.tfidf_matrix.shape[0]} movies (warm start)")
+            return
+        
+        from sklearn.feature_extraction.text import TfidfVectorizer
         
         # Create TF-IDF matrix
         self.tfidf_vectorizer = TfidfVectorizer(
@@ -60,47 +96,411 @@ class HybridRecommender:
             ngram_range=(1, 2)
         )
         
-        self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(
-            self.movies_df['combined_features']
-        )
+        with metrics.stage('fit_content.tfidf'):
+            self.tfidf_matrix = self.tfidf_vectorizer.fit_transform(
+                self.movies_df['combined_features']
+            )
         
         print(f"Content-based model fitted with {self.tfidf_matrix.shape[0]} movies")
+    
+    def _build_title_index(self):
+        """
+        Map lowercased titles to row positions in movies_df (first match wins)
+        """
+        titles = self.movies_df['title'].str.lower()
+        self.title_index = dict(zip(titles[~titles.duplicated()], np.flatnonzero(~titles.duplicated())))
+    
+    def _find_movie(self, movie_title):
+        """
+        Row position of a movie title in movies_df, or None if unknown
+        """
+        if getattr(self, 'title_index', None) is None:
+            self._build_title_index()
+        return self.title_index.get(movie_title.lower())
+    
+    def _warm_tfidf_matrix(self, init_model):
+        """
+        Build the TF-IDF matrix reusing rows of movies whose text is unchanged
+        """
+        previous = init_model.movies_df[['movieId', 'combined_features']].reset_index(drop=True)
+        current = self.movies_df[['movieId', 'combined_features']].reset_index(drop=True)
         
-    def fit_collaborative(self, ratings_df, n_factors=50):
+        matched = current.reset_index().merge(
+            previous.reset_index(),
+            on=['movieId', 'combined_features'],
+            suffixes=('', '_previous')
+        ).drop_duplicates('index')
+        reused = matched['index'].to_numpy()
+        changed = np.setdiff1d(np.arange(len(current)), reused)
+        
+        rows = [init_model.tfidf_matrix[matched['index_previous'].to_numpy()]]
+        if len(changed) > 0:
+            rows.append(self.tfidf_vectorizer.transform(current['combined_features'].iloc[changed]))
+        
+        # Restore the row order of movies_df
+        order = np.concatenate([reused, changed])
+        return vstack(rows).tocsr()[np.argsort(order)]
+        
+    def fit_collaborative(self, ratings_df, n_factors=50, svd_method='arpack',
+                          oversamples=10, n_iter=4, time_budget=None,
+                          progress_callback=None, random_state=42,
+                          init_model=None, max_fold_in_fraction=0.2, warm_n_iter=1,
+                          ann=False, **index_options):
         """
         Fit collaborative filtering model using SVD
         
+        With ``init_model`` the previous ID maps and factors are reused. If only
+        a small share of users and movies changed since the previous model's data
+        watermark, just those rows are recomputed by projecting them onto the
+        previous factors (fold-in). Otherwise the decomposition is rerun, seeded
+        with the previous item subspace so ``warm_n_iter`` iterations suffice;
+        'arpack' cannot be seeded, so it is replaced by 'randomized' here.
+        
         Args:
             ratings_df (DataFrame): User ratings with columns [userId, movieId, rating]
             n_factors (int): Number of latent factors for SVD
+            svd_method (str): Decomposition backend: 'arpack', 'randomized' or 'block_krylov'
+            oversamples (int): Extra sketch columns for the randomized backends
+            n_iter (int): Power/Krylov iterations for the randomized backends
+            time_budget (float): Wall-clock budget in seconds for the decomposition
+            progress_callback (callable): Called with a progress dict per iteration
+            random_state (int): Seed for the randomized backends
+            init_model (HybridRecommender): Previously trained model to start from
+            max_fold_in_fraction (float): Largest share of changed users or movies
+                that is still updated by fold-in instead of a full decomposition
+            warm_n_iter (int): Iterations for a decomposition seeded by init_model
+            ann (bool): Build approximate (clustered) neighbor indexes
+            **index_options: Passed to build_neighbor_indexes (n_clusters, n_probe, ...)
         """
+        from decomposition import centered_operator, centered_frobenius_norm, truncated_svd
+        
         self.ratings_df = ratings_df.copy()
         
-        # Create user-movie matrix
-        self.user_movie_matrix = self.ratings_df.pivot_table(
-            index='userId',
-            columns='movieId',
-            values='rating'
-        ).fillna(0)
+        warm = init_model is not None and init_model.user_factors is not None
+        if warm:
+            self.user_ids = init_model.user_ids
+            self.movie_ids = init_model.movie_ids
+        else:
+            self.user_ids = None
+            self.movie_ids = None
+        
+        with metrics.stage('fit_collab.pivot'):
+            self._build_rating_matrix()
+        self._catalog_columns = None
         
-        # Normalize by subtracting row mean
-        user_ratings_mean = np.mean(self.user_movie_matrix.values, axis=1)
-        ratings_normalized = self.user_movie_matrix.values - user_ratings_mean.reshape(-1, 1)
+        if 'timestamp' in self.ratings_df.columns and len(self.ratings_df) > 0:
+            self.data_watermark = self.ratings_df['timestamp'].max()
+        
+        if warm:
+            touched_users, touched_movies = self._touched_rows(init_model)
+            fold_in = (
+                init_model.user_factors.shape[1] == n_factors and
+                len(touched_users) <= max_fold_in_fraction * len(self.user_ids) and
+                len(touched_movies) <= max_fold_in_fraction * len(self.movie_ids)
+            )
+            if fold_in:
+                with metrics.stage('fit_collab.fold_in'):
+                    self._fold_in(init_model, touched_users, touched_movies)
+                with metrics.stage('fit_collab.neighbors'):
+                    self.build_neighbor_indexes(ann=ann, **index_options)
+                print(f"Collaborative model fitted with {len(self.user_ids)} users "
+                      f"(fold-in of {len(touched_users)} users and {len(touched_movies)} movies, "
+                      f"{self.svd_info['elapsed']:.1f}s)")
+                return
+            n_iter = warm_n_iter
+            if svd_method == 'arpack':
+                # ARPACK cannot be seeded with the previous subspace
+                print("Warm start needs a seedable SVD backend, using 'randomized' instead of 'arpack'")
+                svd_method = 'randomized'
+        
+        ratings_normalized = centered_operator(self.rating_matrix, self.user_ratings_mean)
         
         # Perform SVD
-        U, sigma, Vt = svds(ratings_normalized, k=n_factors)
-        sigma = np.diag(sigma)
-        
-        # Generate predictions
-        self.svd_predictions = np.dot(np.dot(U, sigma), Vt) + user_ratings_mean.reshape(-1, 1)
-        self.svd_predictions = pd.DataFrame(
-            self.svd_predictions,
-            columns=self.user_movie_matrix.columns,
-            index=self.user_movie_matrix.index
+        with metrics.stage('fit_collab.svd'):
+            U, sigma, Vt, self.svd_info = truncated_svd(
+                ratings_normalized,
+                k=n_factors,
+                method=svd_method,
+                oversamples=oversamples,
+                n_iter=n_iter,
+                time_budget=time_budget,
+                callback=progress_callback,
+                random_state=random_state,
+                frobenius_norm=centered_frobenius_norm(self.rating_matrix, self.user_ratings_mean),
+                init=self._previous_item_subspace(init_model) if warm else None
+            )
+        
+        # Predictions are user_factors @ item_factors.T + user mean
+        self.sigma = sigma.astype(np.float32)
+        self.user_factors = np.ascontiguousarray(U * sigma, dtype=np.float32)
+        self.item_factors = np.ascontiguousarray(Vt.T, dtype=np.float32)
+        
+        with metrics.stage('fit_collab.neighbors'):
+            self.build_neighbor_indexes(ann=ann, **index_options)
+        
+        print(f"Collaborative model fitted with {len(self.user_ids)} users "
+              f"({self.svd_info['method']}{', warm start' if warm else ''}, "
+              f"{self.svd_info['elapsed']:.1f}s, "
+              f"reconstruction error {self.svd_info['reconstruction_error']:.4f}"
+              f"{', time budget hit' if self.svd_info['timed_out'] else ''})")
+    
+    def _build_rating_matrix(self):
+        """
+        Build the sparse user-movie matrix and ID maps from self.ratings_df
+        
+        Existing self.user_ids/self.movie_ids keep their positions; IDs not
+        seen before are appended in sorted order.
+        """
+        # Duplicate ratings are averaged like pivot_table does
+        ratings = self.ratings_df[['userId', 'movieId', 'rating']]
+        if ratings.duplicated(['userId', 'movieId']).any():
+            ratings = ratings.groupby(['userId', 'movieId'], as_index=False)['rating'].mean()
+        
+        self.user_ids, user_codes = self._extend_ids(self.user_ids, ratings['userId'])
+        self.movie_ids, movie_codes = self._extend_ids(self.movie_ids, ratings['movieId'])
+        self.user_index = {user_id: row for row, user_id in enumerate(self.user_ids.tolist())}
+        self.movie_index = {movie_id: col for col, movie_id in enumerate(self.movie_ids.tolist())}
+        
+        self.rating_matrix = csr_matrix(
+            (ratings['rating'].to_numpy(dtype=np.float32), (user_codes, movie_codes)),
+            shape=(len(self.user_ids), len(self.movie_ids))
         )
         
-        print(f"Collaborative model fitted with {len(self.user_movie_matrix)} users")
+        # Normalize by subtracting row mean (unrated movies count as 0)
+        self.user_ratings_mean = np.asarray(
+            self.rating_matrix.sum(axis=1), dtype=np.float32
+        ).ravel() / self.rating_matrix.shape[1]
+    
+    @staticmethod
+    def _extend_ids(known_ids, ids):
+        """
+        Map IDs to positions, appending unseen IDs after the known ones
+        
+        Returns:
+            tuple: (all IDs, position of every entry of ids)
+        """
+        if known_ids is None:
+            codes, uniques = pd.factorize(ids, sort=True)
+            return np.asarray(uniques), codes
+        
+        known = pd.Index(known_ids)
+        new_ids = np.unique(ids[~ids.isin(known)].to_numpy())
+        all_ids = np.concatenate([np.asarray(known_ids), new_ids.astype(np.asarray(known_ids).dtype)])
+        return all_ids, pd.Index(all_ids).get_indexer(ids)
+    
+    def _touched_rows(self, init_model):
+        """
+        Users and movies whose ratings changed since init_model was trained
+        
+        A row counts as touched if it has ratings newer than the previous data
+        watermark, or if its rating count or sum differs (which also catches
+        deleted ratings).
+        """
+        n_users_before, n_movies_before = init_model.rating_matrix.shape
+        touched_users = set(range(n_users_before, len(self.user_ids)))
+        touched_movies = set(range(n_movies_before, len(self.movie_ids)))
+        
+        if init_model.data_watermark is not None and 'timestamp' in self.ratings_df.columns:
+            recent = self.ratings_df[self.ratings_df['timestamp'] > init_model.data_watermark]
+            touched_users.update(pd.Index(self.user_ids).get_indexer(recent['userId'].unique()))
+            touched_movies.update(pd.Index(self.movie_ids).get_indexer(recent['movieId'].unique()))
+        
+        current = self.rating_matrix[:n_users_before, :n_movies_before]
+        previous = init_model.rating_matrix
+        for axis, touched in ((1, touched_users), (0, touched_movies)):
+            counts_differ = current.getnnz(axis=axis) != previous.getnnz(axis=axis)
+            sums_differ = ~np.isclose(
+                np.asarray(current.sum(axis=axis)).ravel(),
+                np.asarray(previous.sum(axis=axis)).ravel()
+            )
+            touched.update(np.flatnonzero(counts_differ | sums_differ).tolist())
+        
+        return (np.array(sorted(touched_users), dtype=np.int64),
+                np.array(sorted(touched_movies), dtype=np.int64))
+    
+    def _fold_in(self, init_model, touched_users, touched_movies):
+        """
+        Recompute factors of touched users and movies against the previous model
+        
+        With A the centered ratings and A ~ U S V^T, a user's factor row is
+        A[u] V and a movie's item row is A[:, i]^T U S / S^2.
+        """
+        start = time.perf_counter()
+        n_users_before, n_movies_before = init_model.rating_matrix.shape
+        n_factors = init_model.user_factors.shape[1]
+        
+        self.sigma = init_model.sigma
+        self.user_factors = np.zeros((len(self.user_ids), n_factors), dtype=np.float32)
+        self.user_factors[:n_users_before] = init_model.user_factors
+        self.item_factors = np.zeros((len(self.movie_ids), n_factors), dtype=np.float32)
+        self.item_factors[:n_movies_before] = init_model.item_factors
+        
+        if len(touched_users) > 0:
+            rows = self.rating_matrix[touched_users]
+            self.user_factors[touched_users] = (
+                rows @ self.item_factors -
+                np.outer(self.user_ratings_mean[touched_users], self.item_factors.sum(axis=0))
+            )
+        
+        if len(touched_movies) > 0:
+            columns = self.rating_matrix[:, touched_movies].T.tocsr()
+            self.item_factors[touched_movies] = (
+                columns @ self.user_factors -
+                self.user_ratings_mean @ self.user_factors
+            ) / np.square(self.sigma)
+        
+        self.svd_info = {
+            'method': 'fold_in',
+            'k': n_factors,
+            'iterations': 0,
+            'timed_out': False,
+            'fallback': None,
+            'users_updated': len(touched_users),
+            'movies_updated': len(touched_movies),
+            'elapsed': time.perf_counter() - start,
+            'reconstruction_error': None
+        }
+    
+    def _previous_item_subspace(self, init_model):
+        """
+        Previous item factors aligned with the current movie order
+        """
+        subspace = np.zeros((len(self.movie_ids), init_model.item_factors.shape[1]), dtype=np.float32)
+        subspace[:init_model.item_factors.shape[0]] = init_model.item_factors
+        return subspace
+    
+    def predict_user_ratings(self, user_id):
+        """
+        Predicted ratings of a user for every movie in the ratings matrix
+        
+        Args:
+            user_id (int): User ID
+            
+        Returns:
+            ndarray: Predicted ratings aligned with self.movie_ids, or None for unknown users
+        """
+        row = self.user_index.get(user_id)
+        if row is None:
+            return None
+        return self.user_factors[row] @ self.item_factors.T + self.user_ratings_mean[row]
+    
+    def build_neighbor_indexes(self, ann=False, **index_options):
+        """
+        Build the user and item neighbor indexes from the learned factors
+        
+        Users are compared by their user factors (U * sigma) and movies by
+        V * sigma, so both use the same weighting of latent dimensions as
+        the rating predictions.
+        
+        Args:
+            ann (bool): Build approximate (clustered) indexes
+            **index_options: Passed to NeighborIndex (n_clusters, n_probe, ...)
+        """
+        if self.user_factors is None:
+            raise ValueError("Collaborative model not fitted. Call fit_collaborative first.")
+        
+        self.user_neighbors = NeighborIndex(self.user_factors, ann=ann, **index_options)
+        self.item_neighbors = NeighborIndex(self.item_factors * self.sigma, ann=ann, **index_options)
+    
+    def _check_neighbors(self):
+        if getattr(self, 'user_neighbors', None) is None:
+            raise ValueError(
+                "Neighbor indexes not built. Call fit_collaborative or build_neighbor_indexes first."
+            )
+    
+    def get_similar_users(self, user_id, n_neighbors=10):
+        """
+        Users with the most similar taste, by cosine similarity of user factors
+        
+        Args:
+            user_id (int): User ID
+            n_neighbors (int): Number of users to return
+            
+        Returns:
+            DataFrame: Columns [userId, similarity], most similar first
+        """
+        return self.get_similar_users_batch([user_id], n_neighbors).drop(columns='queryUserId')
+    
+    def get_similar_users_batch(self, user_ids, n_neighbors=10):
+        """
+        Similar users for several users with one matrix product per block
+        
+        Args:
+            user_ids (list): User IDs; unknown users are skipped
+            n_neighbors (int): Number of users per query user
+            
+        Returns:
+            DataFrame: Columns [queryUserId, userId, similarity]
+        """
+        self._check_neighbors()
+        
+        known = [user_id for user_id in user_ids if user_id in self.user_index]
+        rows = [self.user_index[user_id] for user_id in known]
+        with metrics.stage('query.neighbors'):
+            neighbors, scores = self.user_neighbors.query_batch(rows, n_neighbors)
+        
+        found = neighbors >= 0
+        return pd.DataFrame({
+            'queryUserId': np.repeat(np.asarray(known, dtype=self.user_ids.dtype), found.sum(axis=1)),
+            'userId': self.user_ids[neighbors[found]],
+            'similarity': scores[found]
+        })
+    
+    def get_coliked_movies(self, movie_title, n_recommendations=10):
+        """
+        Movies liked by the same users, by cosine similarity of item factors
+        
+        Args:
+            movie_title (str): Title of the movie
+            n_recommendations (int): Number of movies to return
+            
+        Returns:
+            DataFrame: Columns [movieId, title, genres, similarity]
+        """
+        self._check_neighbors()
+        
+        with metrics.stage('query.title_lookup'):
+            position = self._find_movie(movie_title)
+            column = -1 if position is None else self._catalog_collab_columns()[position]
+        
+        if column < 0:
+            return pd.DataFrame()
+        
+        with metrics.stage('query.neighbors'):
+            neighbors, scores = self.item_neighbors.query(column, n_recommendations)
+        
+        return self._collab_frame(neighbors, scores, score_name='similarity')
+    
+    def get_coliked_movies_batch(self, movie_titles, n_recommendations=10):
+        """
+        Co-liked movies for several titles with one matrix product per block
+        
+        Args:
+            movie_titles (list): Titles; unknown or unrated titles are skipped
+            n_recommendations (int): Number of movies per title
+            
+        Returns:
+            DataFrame: Columns [seed_title, movieId, title, genres, similarity]
+        """
+        self._check_neighbors()
+        
+        with metrics.stage('query.title_lookup'):
+            columns = self._catalog_collab_columns()
+            seeds, rows = [], []
+            for title in movie_titles:
+                position = self._find_movie(title)
+                if position is not None and columns[position] >= 0:
+                    seeds.append(title)
+                    rows.append(columns[position])
+        
+        with metrics.stage('query.neighbors'):
+            neighbors, scores = self.item_neighbors.query_batch(rows, n_recommendations)
         
+        found = neighbors >= 0
+        recommendations = self._collab_frame(neighbors[found], scores[found], score_name='similarity')
+        recommendations.insert(0, 'seed_title', np.repeat(seeds, found.sum(axis=1)))
+        return recommendations
+    
     def get_content_recommendations(self, movie_title, n_recommendations=10):
         """
         Get content-based recommendations for a given movie
@@ -115,25 +515,105 @@ class HybridRecommender:
         if self.tfidf_matrix is None:
             raise ValueError("Content-based model not fitted. Call fit_content_based first.")
         
-        # Find movie index
-        idx = self.movies_df[self.movies_df['title'].str.lower() == movie_title.lower()].index
+        return self.get_multi_seed_recommendations([movie_title], n_recommendations=n_recommendations)
+    
+    def get_multi_seed_recommendations(self, movie_titles, weights=None, recency_half_life=None,
+                                       n_recommendations=10):
+        """
+        Get content-based recommendations for a set of seed movies
+        
+        The seed TF-IDF vectors are pooled into one weighted profile and the
+        catalog is scored with a single sparse product, so the cost stays close
+        to a single-seed query. All seeds are excluded from the output.
         
-        if len(idx) == 0:
+        Args:
+            movie_titles (list): Seed titles, ordered from oldest to most recent
+            weights (list): Per-seed weights, e.g. the user's ratings of the seeds
+            recency_half_life (float): If set, a seed's weight halves for every
+                recency_half_life seeds that came after it
+            n_recommendations (int): Number of recommendations to return
+            
+        Returns:
+            DataFrame: Recommended movies with similarity scores
+        """
+        metrics.count('query.multi_seed_recommendations')
+        
+        cosine_sim = self._content_scores(movie_titles, weights, recency_half_life)
+        if cosine_sim is None:
             return pd.DataFrame()
         
-        idx = idx[0]
+        # Get top recommendations (excluding the seed movies)
+        similar_indices = self._top_k(cosine_sim, n_recommendations)
+        if len(similar_indices) == 0:
+            return pd.DataFrame()
+        
+        return self._content_frame(similar_indices, cosine_sim[similar_indices])
+    
+    def _content_scores(self, movie_titles, weights=None, recency_half_life=None):
+        """
+        Cosine similarity of every movie to the pooled seed profile
+        
+        Returns:
+            ndarray: Scores aligned with movies_df rows, -inf for the seeds,
+            or None if none of the titles is known
+        """
+        if self.tfidf_matrix is None:
+            raise ValueError("Content-based model not fitted. Call fit_content_based first.")
+        
+        seed_weights = np.ones(len(movie_titles))
+        if weights is not None:
+            seed_weights *= np.asarray(weights, dtype=np.float64)
+        if recency_half_life:
+            age = np.arange(len(movie_titles))[::-1]
+            seed_weights *= 0.5 ** (age / recency_half_life)
+        
+        # Find movie indices, dropping unknown titles
+        with metrics.stage('query.title_lookup'):
+            positions = [self._find_movie(title) for title in movie_titles]
+            known = [i for i, position in enumerate(positions) if position is not None]
+        
+        if len(known) == 0:
+            return None
         
-        # Calculate similarity scores
-        cosine_sim = cosine_similarity(self.tfidf_matrix[idx], self.tfidf_matrix).flatten()
+        seeds = np.array([positions[i] for i in known])
+        seed_weights = seed_weights[known]
         
-        # Get top recommendations (excluding the input movie)
-        similar_indices = cosine_sim.argsort()[::-1][1:n_recommendations+1]
+        # Pool seed vectors into a unit-length profile; TF-IDF rows are
+        # L2-normalized so the dot product is the cosine similarity
+        with metrics.stage('query.similarity'):
+            profile = csr_matrix(seed_weights.reshape(1, -1)) @ self.tfidf_matrix[seeds]
+            norm = np.sqrt(profile.multiply(profile).sum())
+            if norm > 0:
+                profile = profile / norm
+            cosine_sim = np.asarray((self.tfidf_matrix @ profile.T).todense()).ravel()
         
-        recommendations = self.movies_df.iloc[similar_indices].copy()
-        recommendations['similarity_score'] = cosine_sim[similar_indices]
+        with metrics.stage('query.filter'):
+            cosine_sim[seeds] = -np.inf
+        
+        return cosine_sim
+    
+    def _content_frame(self, indices, scores):
+        """
+        Content-based result rows for movies_df positions
+        """
+        with metrics.stage('query.merge'):
+            recommendations = self.movies_df.iloc[indices].copy()
+            recommendations['similarity_score'] = scores
         
         return recommendations[['title', 'genres', 'similarity_score']]
     
+    @staticmethod
+    def _top_k(scores, k):
+        """
+        Positions of the k highest finite scores, best first
+        """
+        with metrics.stage('query.top_k'):
+            k = min(k, int(np.isfinite(scores).sum()))
+            if k <= 0:
+                return np.zeros(0, dtype=np.int64)
+            top = np.argpartition(-scores, k - 1)[:k]
+            return top[np.argsort(-scores[top], kind='stable')]
+    
     def get_collaborative_recommendations(self, user_id, n_recommendations=10):
         """
         Get collaborative filtering recommendations for a user
@@ -145,90 +625,262 @@ class HybridRecommender:
         Returns:
             DataFrame: Recommended movies with predicted ratings
         """
-        if self.svd_predictions is None:
-            raise ValueError("Collaborative model not fitted. Call fit_collaborative first.")
+        metrics.count('query.collaborative_recommendations')
+        
+        user_predictions = self._collab_scores(user_id)
+        if user_predictions is None:
+            return pd.DataFrame()
         
-        if user_id not in self.svd_predictions.index:
+        # Get top recommendations
+        top = self._top_k(user_predictions, n_recommendations)
+        if len(top) == 0:
             return pd.DataFrame()
         
+        return self._collab_frame(top, user_predictions[top])
+    
+    def _collab_scores(self, user_id):
+        """
+        Predicted ratings of a user with already rated movies set to -inf
+        
+        Returns:
+            ndarray: Scores aligned with self.movie_ids, or None for unknown users
+        """
+        if self.user_factors is None:
+            raise ValueError("Collaborative model not fitted. Call fit_collaborative first.")
+        
         # Get user's predictions
-        user_predictions = self.svd_predictions.loc[user_id]
+        with metrics.stage('query.similarity'):
+            user_predictions = self.predict_user_ratings(user_id)
         
-        # Get movies user hasn't rated
-        rated_movies = self.user_movie_matrix.loc[user_id]
-        rated_movies = rated_movies[rated_movies > 0].index
+        if user_predictions is None:
+            return None
         
         # Filter out already rated movies
-        user_predictions = user_predictions[~user_predictions.index.isin(rated_movies)]
-        
-        # Get top recommendations
-        top_recommendations = user_predictions.nlargest(n_recommendations)
+        with metrics.stage('query.filter'):
+            row = self.user_index[user_id]
+            rated_movies = self.rating_matrix.indices[
+                self.rating_matrix.indptr[row]:self.rating_matrix.indptr[row + 1]
+            ]
+            user_predictions[rated_movies] = -np.inf
         
+        return user_predictions
+    
+    def _collab_frame(self, top, scores, score_name='predicted_rating'):
+        """
+        Collaborative result rows for rating matrix columns
+        """
         # Merge with movie details
-        recommendations = pd.DataFrame({
-            'movieId': top_recommendations.index,
-            'predicted_rating': top_recommendations.values
-        })
+        with metrics.stage('query.merge'):
+            recommendations = pd.DataFrame({
+                'movieId': self.movie_ids[top],
+                score_name: scores
+            })
+            
+            recommendations = recommendations.merge(
+                self.movies_df,
+                left_on='movieId',
+                right_on='movieId',
+                how='left'
+            )
+        
+        return recommendations[['movieId', 'title', 'genres', score_name]]
+    
+    def iter_content_recommendations(self, movie_title, page_size=10, weights=None,
+                                     recency_half_life=None):
+        """
+        Paginated content-based recommendations
         
-        recommendations = recommendations.merge(
-            self.movies_df,
-            left_on='movieId',
-            right_on='movieId',
-            how='left'
+        Similarities are computed once; pages are ranked on demand.
+        
+        Args:
+            movie_title (str or list): Seed title or list of seed titles (oldest first)
+            page_size (int): Recommendations per page
+            weights (list): Per-seed weights
+            recency_half_life (float): Recency decay of the seeds
+            
+        Returns:
+            RankedResults: Use .page(n) or iterate to get DataFrame pages
+        """
+        seed_titles = [movie_title] if isinstance(movie_title, str) else list(movie_title)
+        cosine_sim = self._content_scores(seed_titles, weights, recency_half_life)
+        if cosine_sim is None:
+            cosine_sim = np.zeros(0)
+        return RankedResults(cosine_sim, self._content_frame, page_size)
+    
+    def iter_collaborative_recommendations(self, user_id, page_size=10):
+        """
+        Paginated collaborative filtering recommendations
+        
+        Args:
+            user_id (int): User ID
+            page_size (int): Recommendations per page
+            
+        Returns:
+            RankedResults: Use .page(n) or iterate to get DataFrame pages
+        """
+        user_predictions = self._collab_scores(user_id)
+        if user_predictions is None:
+            user_predictions = np.zeros(0)
+        return RankedResults(user_predictions, self._collab_frame, page_size)
+    
+    def iter_hybrid_recommendations(self, user_id=None, movie_title=None, page_size=10,
+                                    seed_weights=None, recency_half_life=None):
+        """
+        Paginated hybrid recommendations
+        
+        Unlike get_hybrid_recommendations, which normalizes scores within the
+        top candidates of each side, both scores are min-max normalized over
+        the whole catalog so that the ranking does not depend on page depth.
+        
+        Args:
+            user_id (int): User ID for collaborative filtering
+            movie_title (str or list): Seed title or list of seed titles (oldest first)
+            page_size (int): Recommendations per page
+            seed_weights (list): Per-seed weights
+            recency_half_life (float): Recency decay of the seeds
+            
+        Returns:
+            RankedResults: Use .page(n) or iterate to get DataFrame pages
+        """
+        seed_titles = [movie_title] if isinstance(movie_title, str) else list(movie_title or [])
+        
+        content = None
+        if seed_titles:
+            content = self._content_scores(seed_titles, seed_weights, recency_half_life)
+        
+        collab = self._collab_scores(user_id) if user_id else None
+        
+        if content is None and collab is None:
+            return RankedResults(np.zeros(0), self._content_frame, page_size)
+        if content is None:
+            return RankedResults(collab, self._collab_frame, page_size)
+        if collab is None:
+            return RankedResults(content, self._content_frame, page_size)
+        
+        # Align collaborative scores with movies_df rows; unrated-by-model
+        # and already rated movies contribute 0 like the outer merge does
+        columns = self._catalog_collab_columns()
+        collab_scores = np.full(len(content), -np.inf)
+        collab_scores[columns >= 0] = collab[columns[columns >= 0]]
+        
+        hybrid_scores = (
+            self.content_weight * self._min_max(content) +
+            self.collab_weight * np.nan_to_num(self._min_max(collab_scores), neginf=0.0)
         )
         
-        return recommendations[['title', 'genres', 'predicted_rating']]
+        def build_page(indices, scores):
+            with metrics.stage('query.merge'):
+                recommendations = self.movies_df.iloc[indices].copy()
+                recommendations['hybrid_score'] = scores
+            return recommendations[['title', 'genres', 'hybrid_score']]
+        
+        return RankedResults(hybrid_scores, build_page, page_size)
     
-    def get_hybrid_recommendations(self, user_id=None, movie_title=None, n_recommendations=10):
+    @staticmethod
+    def _min_max(scores):
+        """
+        Min-max normalize the finite scores; -inf entries stay -inf
+        """
+        finite = np.isfinite(scores)
+        if not finite.any():
+            return scores
+        low, high = scores[finite].min(), scores[finite].max()
+        normalized = np.full(len(scores), -np.inf)
+        normalized[finite] = (scores[finite] - low) / (high - low) if high > low else 0.0
+        return normalized
+    
+    def _catalog_collab_columns(self):
+        """
+        Rating matrix column of every movies_df row (-1 if the movie has no ratings)
+        """
+        columns = getattr(self, '_catalog_columns', None)
+        if columns is None or len(columns) != len(self.movies_df):
+            columns = pd.Index(self.movie_ids).get_indexer(self.movies_df['movieId'])
+            self._catalog_columns = columns
+        return columns
+    
+    def get_hybrid_recommendations(self, user_id=None, movie_title=None, n_recommendations=10,
+                                   seed_weights=None, recency_half_life=None, diversity=None,
+                                   max_per_genre=None, n_candidates=500):
         """
         Get hybrid recommendations combining content-based and collaborative filtering
         
         Args:
             user_id (int): User ID for collaborative filtering
-            movie_title (str): Movie title for content-based filtering
+            movie_title (str or list): Movie title for content-based filtering, or a
+                list of seed titles (e.g. a watch history, oldest first)
             n_recommendations (int): Number of recommendations to return
+            seed_weights (list): Per-seed weights when movie_title is a list
+            recency_half_life (float): Recency decay when movie_title is a list
+            diversity (float): If set, rerank the top n_candidates with diversify
+            max_per_genre (int): Genre quota for the diversity rerank
+            n_candidates (int): Candidates considered by the diversity rerank
             
         Returns:
             DataFrame: Hybrid recommendations with combined scores
         """
+        if diversity is not None or max_per_genre is not None:
+            candidates = self.get_hybrid_recommendations(
+                user_id, movie_title, max(n_candidates, n_recommendations),
+                seed_weights=seed_weights, recency_half_life=recency_half_life
+            )
+            return self.diversify(candidates, n_recommendations, diversity or 0.0, max_per_genre)
+        
+        metrics.count('query.hybrid_recommendations')
+        
         content_recs = pd.DataFrame()
         collab_recs = pd.DataFrame()
         
+        seed_titles = [movie_title] if isinstance(movie_title, str) else list(movie_title or [])
+        
         # Get content-based recommendations
-        if movie_title:
-            content_recs = self.get_content_recommendations(movie_title, n_recommendations * 2)
+        if seed_titles:
+            content_recs = self.get_multi_seed_recommendations(
+                seed_titles,
+                weights=seed_weights,
+                recency_half_life=recency_half_life,
+                n_recommendations=n_recommendations * 2
+            )
         
         # Get collaborative recommendations
         if user_id:
-            collab_recs = self.get_collaborative_recommendations(user_id, n_recommendations * 2)
+            collab_recs = self.get_collaborative_recommendations(
+                user_id, n_recommendations * 2 + len(seed_titles)
+            )
+            if not collab_recs.empty and seed_titles:
+                seeds = {title.lower() for title in seed_titles}
+                collab_recs = collab_recs[~collab_recs['title'].str.lower().isin(seeds)]
+                collab_recs = collab_recs.head(n_recommendations * 2)
         
         # Combine recommendations
         if not content_recs.empty and not collab_recs.empty:
-            # Normalize scores
-            content_recs['content_score'] = (
-                content_recs['similarity_score'] - content_recs['similarity_score'].min()
-            ) / (content_recs['similarity_score'].max() - content_recs['similarity_score'].min())
-            
-            collab_recs['collab_score'] = (
-                collab_recs['predicted_rating'] - collab_recs['predicted_rating'].min()
-            ) / (collab_recs['predicted_rating'].max() - collab_recs['predicted_rating'].min())
-            
-            # Merge on movie title
-            hybrid = pd.merge(
-                content_recs[['title', 'genres', 'content_score']],
-                collab_recs[['title', 'collab_score']],
-                on='title',
-                how='outer'
-            ).fillna(0)
-            
-            # Calculate hybrid score
-            hybrid['hybrid_score'] = (
-                self.content_weight * hybrid['content_score'] +
-                self.collab_weight * hybrid['collab_score']
-            )
+            with metrics.stage('query.hybrid_merge'):
+                # Normalize scores
+                content_recs['content_score'] = (
+                    content_recs['similarity_score'] - content_recs['similarity_score'].min()
+                ) / (content_recs['similarity_score'].max() - content_recs['similarity_score'].min())
+                
+                collab_recs['collab_score'] = (
+                    collab_recs['predicted_rating'] - collab_recs['predicted_rating'].min()
+                ) / (collab_recs['predicted_rating'].max() - collab_recs['predicted_rating'].min())
+                
+                # Merge on movie title
+                hybrid = pd.merge(
+                    content_recs[['title', 'genres', 'content_score']],
+                    collab_recs[['title', 'collab_score']],
+                    on='title',
+                    how='outer'
+                ).fillna(0)
+                
+                # Calculate hybrid score
+                hybrid['hybrid_score'] = (
+                    self.content_weight * hybrid['content_score'] +
+                    self.collab_weight * hybrid['collab_score']
+                )
             
             # Sort and return top recommendations
-            hybrid = hybrid.sort_values('hybrid_score', ascending=False).head(n_recommendations)
+            with metrics.stage('query.top_k'):
+                hybrid = hybrid.sort_values('hybrid_score', ascending=False).head(n_recommendations)
             return hybrid[['title', 'genres', 'hybrid_score']]
         
         elif not content_recs.empty:
@@ -240,19 +892,95 @@ class HybridRecommender:
         else:
             return pd.DataFrame()
     
+    def diversify(self, recommendations, n_recommendations=10, diversity=0.3,
+                  max_per_genre=None, vectors='content'):
+        """
+        Rerank recommendations by maximal marginal relevance
+        
+        Args:
+            recommendations (DataFrame): Output of any get_*_recommendations
+                method; its last column is used as the relevance score
+            n_recommendations (int): Number of recommendations to return
+            diversity (float): Relevance/diversity tradeoff, 0 keeps the original order
+            max_per_genre (int): Maximum recommendations sharing any one genre
+            vectors (str): 'content' for TF-IDF vectors or 'collaborative' for
+                the learned item factors
+            
+        Returns:
+            DataFrame: The selected rows in reranked order
+        """
+        if recommendations.empty:
+            return recommendations
+        if vectors not in ('content', 'collaborative'):
+            raise ValueError(f"Unknown vectors '{vectors}'. Choose 'content' or 'collaborative'.")
+        
+        with metrics.stage('query.title_lookup'):
+            positions = [
+                self._find_movie(title) if isinstance(title, str) else None
+                for title in recommendations['title']
+            ]
+            known = np.array([i for i, position in enumerate(positions) if position is not None],
+                             dtype=np.int64)
+            positions = np.array([positions[i] for i in known], dtype=np.int64)
+        
+        with metrics.stage('query.diversity'):
+            if vectors == 'content':
+                candidate_vectors = self.tfidf_matrix[positions]
+            else:
+                if self.item_factors is None:
+                    raise ValueError("Collaborative model not fitted. Call fit_collaborative first.")
+                columns = self._catalog_collab_columns()[positions]
+                candidate_vectors = np.zeros((len(positions), self.item_factors.shape[1]), dtype=np.float32)
+                candidate_vectors[columns >= 0] = self.item_factors[columns[columns >= 0]]
+                norms = np.linalg.norm(candidate_vectors, axis=1, keepdims=True)
+                candidate_vectors /= np.maximum(norms, 1e-12)
+            
+            genres = self._catalog_genre_matrix()[positions] if max_per_genre is not None else None
+            relevance = recommendations.iloc[known, -1].to_numpy(dtype=np.float64)
+            order = mmr_rerank(relevance, candidate_vectors, n_recommendations, diversity,
+                               genres, max_per_genre)
+        
+        return recommendations.iloc[known[order]]
+    
+    def _catalog_genre_matrix(self):
+        """
+        Boolean genre indicator matrix of the movies_df rows
+        """
+        genres = getattr(self, '_catalog_genres', None)
+        if genres is None or len(genres) != len(self.movies_df):
+            genres, _ = genre_matrix(self.movies_df['genres'])
+            self._catalog_genres = genres
+        return genres
+    
     def save_model(self, filepath):
-        """Save the trained model"""
-        with open(filepath, 'wb') as f:
+        """Save the trained model (atomically, so readers never see a partial file)"""
+        tmp_path = filepath + '.tmp'
+        with open(tmp_path, 'wb') as f:
             pickle.dump(self, f)
+        os.replace(tmp_path, filepath)
     
     @staticmethod
     def load_model(filepath):
-        """Load a trained model"""
+        """
+        Load a trained model
+
+        Raises:
+            ValueError: If the file holds a model saved in the old dense
+                layout (svd_predictions / user_movie_matrix), which this
+                version cannot query
+        """
         with open(filepath, 'rb') as f:
-            return pickle.load(f)
+            model = pickle.load(f)
+        state = vars(model)
+        if 'user_factors' not in state and ('svd_predictions' in state or 'user_movie_matrix' in state):
+            raise ValueError(
+                f"Model '{filepath}' was saved in the old dense layout and cannot be loaded. "
+                "Retrain it with: python train.py"
+            )
+        return model
 
 
-def evaluate_recommendations(recommender, test_ratings, k=10):
+def evaluate_recommendations(recommender, test_ratings, k=10, n_users=100):
     """
     Evaluate recommendation quality using precision@k and recall@k
     
@@ -260,6 +988,7 @@ def evaluate_recommendations(recommender, test_ratings, k=10):
         recommender: Trained HybridRecommender instance
         test_ratings: Test set ratings DataFrame
         k: Number of top recommendations to consider
+        n_users: Number of test users to evaluate (first n in test order)
         
     Returns:
         dict: Evaluation metrics
@@ -267,12 +996,11 @@ def evaluate_recommendations(recommender, test_ratings, k=10):
     precisions = []
     recalls = []
     
-    for user_id in test_ratings['userId'].unique()[:100]:  # Sample 100 users
-        # Get actual relevant items (rated >= 4.0)
-        relevant_items = set(
-            test_ratings[(test_ratings['userId'] == user_id) & 
-                        (test_ratings['rating'] >= 4.0)]['movieId']
-        )
+    # Actual relevant items (rated >= 4.0) per user, grouped once
+    relevant = test_ratings[test_ratings['rating'] >= 4.0].groupby('userId')['movieId'].apply(set)
+    
+    for user_id in test_ratings['userId'].unique()[:n_users]:
+        relevant_items = relevant.get(user_id, set())
         
         if len(relevant_items) == 0:
             continue
@@ -0,0 +1,345 @@
+"""
+Versioned model registry with background hot-swap for long-running processes
+"""
+
+import os
+import re
+import socket
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from recommender import HybridRecommender
+
+
+ARTIFACT_PREFIX = 'hybrid_recommender-'
+ARTIFACT_SUFFIX = '.pkl'
+PIN_FILE = 'CURRENT'
+# One lease file per ModelRegistry process, holding the version it serves
+LEASE_PREFIX = 'SERVING-'
+_VERSION_PATTERN = re.compile(
+    rf'^{re.escape(ARTIFACT_PREFIX)}(.+){re.escape(ARTIFACT_SUFFIX)}$'
+)
+
+
+def artifact_path(directory, version):
+    """Path of the artifact for a model version"""
+    return os.path.join(directory, f"{ARTIFACT_PREFIX}{version}{ARTIFACT_SUFFIX}")
+
+
+def list_versions(directory):
+    """
+    Model versions available in a directory, oldest first
+
+    Versions are UTC timestamps, so lexical order is chronological.
+    """
+    if not os.path.isdir(directory):
+        return []
+    versions = []
+    for name in os.listdir(directory):
+        match = _VERSION_PATTERN.match(name)
+        if match:
+            versions.append(match.group(1))
+    return sorted(versions)
+
+
+def save_version(recommender, directory, keep=None):
+    """
+    Save a trained model as a new version
+
+    Args:
+        recommender: Trained HybridRecommender instance
+        directory (str): Registry directory
+        keep (int): If set, prune to the newest keep versions afterwards
+
+    Returns:
+        str: The new version
+    """
+    os.makedirs(directory, exist_ok=True)
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    recommender.save_model(artifact_path(directory, version))
+    if keep is not None:
+        prune_versions(directory, keep)
+    return version
+
+
+def prune_versions(directory, keep):
+    """
+    Delete all but the newest keep versions
+
+    The pinned version and versions served by running registries are
+    never deleted, even if they are older.
+
+    Args:
+        directory (str): Registry directory
+        keep (int): Number of newest versions to keep (at least 1)
+
+    Returns:
+        list: Deleted versions
+    """
+    if keep < 1:
+        raise ValueError("keep must be at least 1")
+    protected = {target_version(directory)} | serving_versions(directory)
+    deleted = []
+    for version in list_versions(directory)[:-keep]:
+        if version not in protected:
+            os.remove(artifact_path(directory, version))
+            deleted.append(version)
+    return deleted
+
+
+def _lease_path(directory):
+    return os.path.join(directory, f"{LEASE_PREFIX}{socket.gethostname()}-{os.getpid()}")
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def record_serving(directory, version):
+    """Record the version this process serves, for prune_versions"""
+    path = _lease_path(directory)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp_path, path)
+
+
+def serving_versions(directory):
+    """
+    Versions served by running registries
+
+    Leases of exited processes on this host are removed; leases from other
+    hosts are trusted.
+    """
+    if not os.path.isdir(directory):
+        return set()
+    host = socket.gethostname()
+    versions = set()
+    for name in os.listdir(directory):
+        if not name.startswith(LEASE_PREFIX) or name.endswith('.tmp'):
+            continue
+        path = os.path.join(directory, name)
+        lease_host, _, pid = name[len(LEASE_PREFIX):].rpartition('-')
+        if lease_host == host and pid.isdigit() and not _process_alive(int(pid)):
+            os.remove(path)
+            continue
+        try:
+            with open(path) as f:
+                versions.add(f.read().strip())
+        except FileNotFoundError:
+            continue
+    return versions
+
+
+def pinned_version(directory):
+    """Version pinned by a rollback, or None if the newest version is served"""
+    path = os.path.join(directory, PIN_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return f.read().strip() or None
+
+
+def pin_version(directory, version):
+    """
+    Pin the version that registries watching the directory should serve
+
+    Args:
+        directory (str): Registry directory
+        version (str): Version to serve, or None to go back to the newest
+    """
+    path = os.path.join(directory, PIN_FILE)
+    if version is None:
+        if os.path.exists(path):
+            os.remove(path)
+        return
+    if version not in list_versions(directory):
+        raise ValueError(f"Unknown model version '{version}'")
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        f.write(version + '\n')
+    os.replace(tmp_path, path)
+
+
+def target_version(directory):
+    """Version that should be served: the pinned one, else the newest"""
+    pinned = pinned_version(directory)
+    if pinned is not None:
+        return pinned
+    versions = list_versions(directory)
+    return versions[-1] if versions else None
+
+
+def rollback(directory, version=None):
+    """
+    Pin the version before the one currently targeted (or a given version)
+
+    Returns:
+        str: The pinned version
+    """
+    if version is None:
+        versions = list_versions(directory)
+        current = target_version(directory)
+        if current not in versions or versions.index(current) == 0:
+            raise ValueError("No earlier model version to roll back to")
+        version = versions[versions.index(current) - 1]
+    pin_version(directory, version)
+    return version
+
+
+class _LoadedModel:
+    """A loaded model version and the number of requests using it"""
+
+    def __init__(self, version, model):
+        self.version = version
+        self.model = model
+        self.in_flight = 0
+        self.retired = False
+
+
+class ModelRegistry:
+    """
+    Serve the current model version and hot-swap to new ones in the background
+
+    New artifacts are loaded and warmed up with a replay of recent queries
+    before being swapped in. Requests that started on the old model finish
+    on it; the old model is released once its last request completes.
+    """
+
+    def __init__(self, directory='models/versions', poll_interval=30.0,
+                 warmup_queries=100, loader=HybridRecommender.load_model):
+        """
+        Initialize the registry
+
+        Args:
+            directory (str): Directory holding versioned model artifacts
+            poll_interval (float): Seconds between checks for a new version
+            warmup_queries (int): Number of recent queries replayed on a new model
+            loader (callable): Loads a model from an artifact path
+        """
+        self.directory = directory
+        self.poll_interval = poll_interval
+        self.loader = loader
+        self.recent_queries = deque(maxlen=warmup_queries)
+        self._active = None
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def version(self):
+        """Version currently served"""
+        active = self._active
+        return active.version if active is not None else None
+
+    def start(self):
+        """
+        Load the current version and start watching for new ones
+        """
+        self.refresh()
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._watch, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop watching for new versions"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _watch(self):
+        while not self._stop.wait(self.poll_interval):
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Model registry: failed to load new version: {e}")
+
+    def refresh(self):
+        """
+        Swap to the target version if it differs from the one being served
+
+        Returns:
+            bool: True if a new version was swapped in
+        """
+        with self._swap_lock:
+            version = target_version(self.directory)
+            if version is None or version == self.version:
+                return False
+
+            model = self.loader(artifact_path(self.directory, version))
+            self._warm_up(model)
+            self._swap(_LoadedModel(version, model))
+            record_serving(self.directory, version)
+            return True
+
+    def rollback(self, version=None):
+        """
+        Pin and serve the previous version (or a given version)
+
+        Returns:
+            str: The version now served
+        """
+        version = rollback(self.directory, version)
+        self.refresh()
+        return version
+
+    def _warm_up(self, model):
+        for method, args, kwargs in list(self.recent_queries):
+            try:
+                getattr(model, method)(*args, **kwargs)
+            except Exception:
+                pass
+
+    def _swap(self, loaded):
+        with self._lock:
+            previous = self._active
+            self._active = loaded
+            if previous is not None:
+                previous.retired = True
+                if previous.in_flight == 0:
+                    previous.model = None
+
+    @contextmanager
+    def acquire(self):
+        """
+        Use the current model for the duration of a request
+
+        Yields:
+            HybridRecommender: The model, valid until the block exits even
+            if a new version is swapped in meanwhile
+        """
+        with self._lock:
+            loaded = self._active
+            if loaded is None:
+                raise ValueError("No model loaded. Call start() or refresh() first.")
+            loaded.in_flight += 1
+        try:
+            yield loaded.model
+        finally:
+            with self._lock:
+                loaded.in_flight -= 1
+                if loaded.retired and loaded.in_flight == 0:
+                    loaded.model = None
+
+    def query(self, method, *args, **kwargs):
+        """
+        Call a recommender method on the current model and record it for warm-up
+
+        Example:
+            registry.query('get_hybrid_recommendations', user_id=1, movie_title='Heat')
+        """
+        self.recent_queries.append((method, args, kwargs))
+        with self.acquire() as model:
+            return getattr(model, method)(*args, **kwargs)
@@ -0,0 +1,344 @@
+"""
+Slim inference-only model for serving
+Depends only on numpy, so workers start without importing pandas, sklearn
+or scipy. Load an artifact written by save_serving_model.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime, timezone
+
+import numpy as np
+
+
+SERVING_VERSION = 1
+
+
+def save_serving_model(recommender, directory, keep=2):
+    """
+    Write the arrays needed for inference as memory-mappable .npy files
+
+    The files go into a fresh sibling directory ('<directory>-<version>'),
+    and directory is then atomically repointed to it as a symlink. Workers
+    that memory-mapped the previous artifact keep reading its untouched
+    files.
+
+    Args:
+        recommender: Trained HybridRecommender instance
+        directory (str): Path of the artifact symlink
+        keep (int): Artifact directories to keep, including the new one
+    """
+    if recommender.tfidf_matrix is None:
+        raise ValueError("Content-based model not fitted. Call fit_content_based first.")
+
+    directory = os.path.normpath(directory)
+    version = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%fZ')
+    target = f"{directory}-{version}"
+    os.makedirs(target)
+    meta_path = os.path.join(target, 'meta.json')
+
+    movies = recommender.movies_df
+    titles = movies['title'].astype(str).to_numpy(dtype=str)
+    tfidf = recommender.tfidf_matrix.tocsr()
+    tfidf_csc = tfidf.tocsc()
+
+    # Sorted lowercase titles let lookups use a binary search on the mapped
+    # array instead of building a dict at load time
+    title_keys, title_rows = _sorted_keys(np.char.lower(titles))
+
+    arrays = {
+        'movie_ids': movies['movieId'].to_numpy(dtype=np.int64),
+        'titles': titles,
+        'genres': movies['genres'].fillna('').astype(str).to_numpy(dtype=str),
+        'title_keys': title_keys,
+        'title_rows': title_rows,
+        'tfidf_indptr': tfidf.indptr.astype(np.int64),
+        'tfidf_indices': tfidf.indices.astype(np.int32),
+        'tfidf_data': tfidf.data.astype(np.float32),
+        'tfidf_csc_indptr': tfidf_csc.indptr.astype(np.int64),
+        'tfidf_csc_indices': tfidf_csc.indices.astype(np.int32),
+        'tfidf_csc_data': tfidf_csc.data.astype(np.float32),
+    }
+
+    has_collaborative = recommender.user_factors is not None
+    if has_collaborative:
+        rating_matrix = recommender.rating_matrix.tocsr()
+        user_keys, user_rows = _sorted_keys(np.asarray(recommender.user_ids, dtype=np.int64))
+        catalog_keys, catalog_rows = _sorted_keys(arrays['movie_ids'])
+        arrays.update({
+            'user_keys': user_keys,
+            'user_rows': user_rows,
+            'collab_to_catalog': _lookup(catalog_keys, catalog_rows, np.asarray(recommender.movie_ids)),
+            'user_factors': np.ascontiguousarray(recommender.user_factors, dtype=np.float32),
+            'item_factors': np.ascontiguousarray(recommender.item_factors, dtype=np.float32),
+            'user_ratings_mean': np.asarray(recommender.user_ratings_mean, dtype=np.float32),
+            'rated_indptr': rating_matrix.indptr.astype(np.int64),
+            'rated_indices': rating_matrix.indices.astype(np.int32),
+        })
+
+    for name, array in arrays.items():
+        np.save(os.path.join(target, f"{name}.npy"), array)
+
+    meta = {
+        'version': SERVING_VERSION,
+        'content_weight': recommender.content_weight,
+        'collab_weight': recommender.collab_weight,
+        'n_features': int(tfidf.shape[1]),
+        'has_collaborative': has_collaborative,
+    }
+    with open(meta_path, 'w') as f:
+        json.dump(meta, f)
+
+    _swap_link(directory, target)
+    _prune_versions(directory, keep)
+
+
+def _swap_link(directory, target):
+    """Atomically point the directory symlink at target"""
+    if os.path.isdir(directory) and not os.path.islink(directory):
+        # Artifact written by an older version as a plain directory
+        written = datetime.fromtimestamp(os.path.getmtime(directory), timezone.utc)
+        os.rename(directory, f"{directory}-{written.strftime('%Y%m%dT%H%M%S%fZ')}")
+
+    tmp_link = directory + '.tmp'
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(os.path.basename(target), tmp_link)
+    os.replace(tmp_link, directory)
+
+
+def _prune_versions(directory, keep):
+    """Delete all but the newest keep artifact directories"""
+    parent, name = os.path.split(directory)
+    current = os.path.realpath(directory)
+    versions = sorted(
+        entry for entry in os.listdir(parent or '.')
+        if entry.startswith(f"{name}-") and os.path.isdir(os.path.join(parent, entry))
+    )
+    # Unlinked files stay readable for processes that still map them
+    for entry in versions[:max(len(versions) - keep, 0)]:
+        path = os.path.join(parent, entry)
+        if os.path.realpath(path) != current:
+            shutil.rmtree(path)
+
+
+def _sorted_keys(keys):
+    """Sorted unique keys and the row of each key's first occurrence"""
+    order = np.argsort(keys, kind='stable')
+    sorted_keys = keys[order]
+    first = np.ones(len(sorted_keys), dtype=bool)
+    first[1:] = sorted_keys[1:] != sorted_keys[:-1]
+    return sorted_keys[first], order[first].astype(np.int64)
+
+
+def _lookup(keys, rows, values):
+    """Rows of values in a (keys, rows) index, -1 where missing"""
+    positions = np.searchsorted(keys, values)
+    positions = np.minimum(positions, max(len(keys) - 1, 0))
+    found = (len(keys) > 0) & (keys[positions] == values)
+    return np.where(found, rows[positions], -1)
+
+
+def _ranges(starts, ends):
+    """Concatenation of arange(start, end) for every pair, without a loop"""
+    lengths = ends - starts
+    shifts = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return shifts + np.arange(lengths.sum())
+
+
+def _top_k(scores, k, exclude=None):
+    """Positions of the k highest finite scores, best first"""
+    if exclude is not None and len(exclude) > 0:
+        scores = scores.copy()
+        scores[exclude] = -np.inf
+    k = min(k, int(np.isfinite(scores).sum()))
+    if k <= 0:
+        return np.zeros(0, dtype=np.int64)
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
+def _min_max(values):
+    """Min-max normalize; a constant vector maps to zeros"""
+    spread = values.max() - values.min()
+    if spread == 0:
+        return np.zeros_like(values)
+    return (values - values.min()) / spread
+
+
+class ServingModel:
+    """
+    Inference-only counterpart of HybridRecommender
+
+    Query methods mirror HybridRecommender but return lists of dicts
+    instead of DataFrames. Arrays are memory-mapped, so loading is close
+    to instant and pages are shared between worker processes.
+    """
+
+    def __init__(self, directory, mmap=True):
+        """
+        Load a serving artifact
+
+        Args:
+            directory (str): Directory written by save_serving_model
+            mmap (bool): Memory-map arrays instead of reading them into memory
+        """
+        # Resolve the symlink once so a concurrent swap cannot mix versions
+        directory = os.path.realpath(directory)
+        meta_path = os.path.join(directory, 'meta.json')
+        if not os.path.exists(meta_path):
+            raise FileNotFoundError(f"No complete serving model found in '{directory}'")
+        with open(meta_path) as f:
+            self.meta = json.load(f)
+        if self.meta['version'] != SERVING_VERSION:
+            raise ValueError(f"Unsupported serving model version {self.meta['version']}")
+
+        self.content_weight = self.meta['content_weight']
+        self.collab_weight = self.meta['collab_weight']
+        self.n_features = self.meta['n_features']
+
+        mmap_mode = 'r' if mmap else None
+        for name in os.listdir(directory):
+            if name.endswith('.npy'):
+                setattr(self, name[:-4], np.load(os.path.join(directory, name), mmap_mode=mmap_mode))
+
+        self.n_movies = len(self.movie_ids)
+        if not self.meta['has_collaborative']:
+            self.user_factors = None
+
+    @classmethod
+    def load(cls, directory, mmap=True):
+        """Load a serving artifact"""
+        return cls(directory, mmap=mmap)
+
+    def find_movie(self, movie_title):
+        """Row of a title (case-insensitive), or None if unknown"""
+        row = _lookup(self.title_keys, self.title_rows, np.array([movie_title.lower()]))[0]
+        return None if row < 0 else int(row)
+
+    def _user_row(self, user_id):
+        if self.user_factors is None:
+            raise ValueError("Serving model has no collaborative part.")
+        row = _lookup(self.user_keys, self.user_rows, np.array([user_id], dtype=np.int64))[0]
+        return None if row < 0 else int(row)
+
+    def _results(self, rows, scores, score_name):
+        return [
+            {
+                'movieId': int(self.movie_ids[row]),
+                'title': str(self.titles[row]),
+                'genres': str(self.genres[row]),
+                score_name: float(score),
+            }
+            for row, score in zip(rows, scores)
+        ]
+
+    def content_scores(self, seeds, seed_weights):
+        """
+        Cosine similarity of every movie to the pooled seed profile
+
+        Only the TF-IDF columns present in the profile are touched.
+        """
+        starts, ends = self.tfidf_indptr[seeds], self.tfidf_indptr[seeds + 1]
+        entries = _ranges(starts, ends)
+        profile = np.bincount(
+            self.tfidf_indices[entries],
+            weights=self.tfidf_data[entries] * np.repeat(seed_weights, ends - starts),
+            minlength=self.n_features
+        )
+        norm = np.linalg.norm(profile)
+        if norm > 0:
+            profile /= norm
+
+        columns = np.flatnonzero(profile)
+        starts, ends = self.tfidf_csc_indptr[columns], self.tfidf_csc_indptr[columns + 1]
+        entries = _ranges(starts, ends)
+        return np.bincount(
+            self.tfidf_csc_indices[entries],
+            weights=self.tfidf_csc_data[entries] * np.repeat(profile[columns], ends - starts),
+            minlength=self.n_movies
+        )
+
+    def _content_top(self, movie_titles, weights, recency_half_life, n_recommendations):
+        seed_weights = np.ones(len(movie_titles))
+        if weights is not None:
+            seed_weights *= np.asarray(weights, dtype=np.float64)
+        if recency_half_life:
+            seed_weights *= 0.5 ** (np.arange(len(movie_titles))[::-1] / recency_half_life)
+
+        rows = [self.find_movie(title) for title in movie_titles]
+        known = [i for i, row in enumerate(rows) if row is not None]
+        if not known:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+
+        seeds = np.array([rows[i] for i in known], dtype=np.int64)
+        scores = self.content_scores(seeds, seed_weights[known])
+        top = _top_k(scores, n_recommendations, exclude=seeds)
+        return top, scores[top]
+
+    def get_content_recommendations(self, movie_title, n_recommendations=10):
+        """Content-based recommendations for a movie"""
+        return self.get_multi_seed_recommendations([movie_title], n_recommendations=n_recommendations)
+
+    def get_multi_seed_recommendations(self, movie_titles, weights=None, recency_half_life=None,
+                                       n_recommendations=10):
+        """Content-based recommendations for a set of seed movies (oldest first)"""
+        rows, scores = self._content_top(movie_titles, weights, recency_half_life, n_recommendations)
+        return self._results(rows, scores, 'similarity_score')
+
+    def _collab_top(self, user_id, n_recommendations):
+        row = self._user_row(user_id)
+        if row is None:
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        scores = self.user_factors[row] @ self.item_factors.T + self.user_ratings_mean[row]
+        rated = self.rated_indices[self.rated_indptr[row]:self.rated_indptr[row + 1]]
+        # Movies without metadata cannot be shown
+        scores[self.collab_to_catalog < 0] = -np.inf
+        top = _top_k(scores, n_recommendations, exclude=rated)
+        return self.collab_to_catalog[top], scores[top]
+
+    def get_collaborative_recommendations(self, user_id, n_recommendations=10):
+        """Collaborative filtering recommendations for a user"""
+        rows, scores = self._collab_top(user_id, n_recommendations)
+        return self._results(rows, scores, 'predicted_rating')
+
+    def get_hybrid_recommendations(self, user_id=None, movie_title=None, n_recommendations=10,
+                                   seed_weights=None, recency_half_life=None):
+        """
+        Hybrid recommendations, scored the same way as HybridRecommender
+        """
+        seed_titles = [movie_title] if isinstance(movie_title, str) else list(movie_title or [])
+
+        content_rows, content_scores = np.zeros(0, dtype=np.int64), np.zeros(0)
+        if seed_titles:
+            content_rows, content_scores = self._content_top(
+                seed_titles, seed_weights, recency_half_life, n_recommendations * 2
+            )
+
+        collab_rows, collab_scores = np.zeros(0, dtype=np.int64), np.zeros(0)
+        if user_id:
+            collab_rows, collab_scores = self._collab_top(user_id, n_recommendations * 2 + len(seed_titles))
+            if len(collab_rows) > 0 and seed_titles:
+                seeds = {title.lower() for title in seed_titles}
+                keep = np.array([str(self.titles[row]).lower() not in seeds for row in collab_rows])
+                collab_rows = collab_rows[keep][:n_recommendations * 2]
+                collab_scores = collab_scores[keep][:n_recommendations * 2]
+
+        if len(content_rows) > 0 and len(collab_rows) > 0:
+            combined = {}
+            for row, score in zip(content_rows, _min_max(content_scores)):
+                combined[row] = self.content_weight * score
+            for row, score in zip(collab_rows, _min_max(collab_scores)):
+                combined[row] = combined.get(row, 0.0) + self.collab_weight * score
+            rows = np.array(list(combined.keys()), dtype=np.int64)
+            scores = np.array(list(combined.values()))
+            top = _top_k(scores, n_recommendations)
+            return self._results(rows[top], scores[top], 'hybrid_score')
+
+        if len(content_rows) > 0:
+            return self._results(content_rows[:n_recommendations],
+                                 content_scores[:n_recommendations], 'similarity_score')
+
+        return self._results(collab_rows[:n_recommendations],
+                             collab_scores[:n_recommendations], 'predicted_rating')
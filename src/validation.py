@@ -0,0 +1,201 @@
+"""
+Parallel k-fold cross-validation for the hybrid recommender
+Folds run in a process pool that reads the ratings from shared memory
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from recommender import HybridRecommender, evaluate_recommendations
+
+
+SPLITS = ('random', 'temporal')
+RATING_COLUMNS = ('userId', 'movieId', 'rating', 'timestamp')
+
+# Per-worker state set by _init_worker
+_worker = {}
+
+
+def assign_folds(ratings, n_folds=5, split='random', seed=42):
+    """
+    Fold number of every rating
+
+    A random split shuffles ratings into n_folds equal folds. A temporal
+    split cuts the timeline into n_folds + 1 equal-count chunks; fold i
+    trains on chunks 0..i and tests on chunk i + 1, so no fold trains on
+    ratings from after its test period.
+
+    Args:
+        ratings (DataFrame): Ratings, with a timestamp column for temporal splits
+        n_folds (int): Number of folds
+        split (str): 'random' or 'temporal'
+        seed (int): Seed for the random split
+
+    Returns:
+        ndarray: int16 chunk/fold number per rating
+    """
+    if split not in SPLITS:
+        raise ValueError(f"Unknown split '{split}'. Choose from {SPLITS}.")
+
+    n = len(ratings)
+    folds = np.empty(n, dtype=np.int16)
+    if split == 'random':
+        order = np.random.default_rng(seed).permutation(n)
+        folds[order] = np.arange(n) % n_folds
+    else:
+        if 'timestamp' not in ratings.columns:
+            raise ValueError("Temporal split needs a 'timestamp' column.")
+        order = np.argsort(ratings['timestamp'].to_numpy(), kind='stable')
+        folds[order] = np.arange(n) * (n_folds + 1) // n
+    return folds
+
+
+def fold_masks(folds, fold, split):
+    """Boolean (train, test) masks for one fold"""
+    if split == 'random':
+        test = folds == fold
+        return ~test, test
+    return folds <= fold, folds == fold + 1
+
+
+def _share(array):
+    """Copy an array into a new shared memory block"""
+    block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+    return block, (block.name, array.dtype.str, array.shape)
+
+
+def _attach(spec):
+    name, dtype, shape = spec
+    block = shared_memory.SharedMemory(name=name)
+    array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+    array.flags.writeable = False
+    return block, array
+
+
+def _init_worker(column_specs, folds_spec, movies, config):
+    # Attach once per worker; tasks then only carry a fold number
+    blocks = []
+    columns = {}
+    for column, spec in column_specs.items():
+        block, columns[column] = _attach(spec)
+        blocks.append(block)
+    block, folds = _attach(folds_spec)
+    blocks.append(block)
+
+    _worker.update(blocks=blocks, columns=columns, folds=folds, movies=movies, config=config)
+
+
+def _run_fold(fold):
+    config = _worker['config']
+    columns = _worker['columns']
+    train_mask, test_mask = fold_masks(_worker['folds'], fold, config['split'])
+
+    # Boolean indexing copies just this fold's rows out of shared memory
+    train_ratings = pd.DataFrame({column: values[train_mask] for column, values in columns.items()})
+    test_ratings = pd.DataFrame({column: values[test_mask] for column, values in columns.items()})
+
+    start = time.perf_counter()
+    recommender = HybridRecommender(content_weight=0.5, collab_weight=0.5)
+    recommender.fit_content_based(_worker['movies'], features=config['features'])
+    recommender.fit_collaborative(
+        train_ratings,
+        n_factors=config['n_factors'],
+        svd_method=config['svd_method'],
+        random_state=config['seed']
+    )
+    fit_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    metrics = evaluate_recommendations(recommender, test_ratings, k=config['k'], n_users=config['n_users'])
+    eval_seconds = time.perf_counter() - start
+
+    return {
+        'fold': fold,
+        'n_train': int(train_mask.sum()),
+        'n_test': int(test_mask.sum()),
+        'fit_seconds': fit_seconds,
+        'eval_seconds': eval_seconds,
+        'metrics': metrics
+    }
+
+
+def cross_validate(movies, ratings, n_folds=5, split='random', n_workers=None,
+                   features=('genres', 'overview'), n_factors=50, svd_method='arpack',
+                   k=10, n_users=100, seed=42):
+    """
+    Fit and evaluate the hybrid recommender on k folds in parallel
+
+    The rating columns and fold assignment are placed in shared memory
+    once; each worker attaches to them at startup, so the ratings are not
+    pickled per task.
+
+    Args:
+        movies (DataFrame): Preprocessed movie metadata
+        ratings (DataFrame): Preprocessed ratings
+        n_folds (int): Number of folds
+        split (str): 'random' or 'temporal'
+        n_workers (int): Worker processes (defaults to min(n_folds, CPU count))
+        features (tuple): Content features for fit_content_based
+        n_factors (int): Latent factors for fit_collaborative
+        svd_method (str): SVD backend for fit_collaborative
+        k (int): Cutoff for precision/recall@k
+        n_users (int): Test users evaluated per fold
+        seed (int): Seed for the random split and SVD
+
+    Returns:
+        dict: Per-fold results and the mean/std of every metric
+    """
+    folds = assign_folds(ratings, n_folds, split, seed)
+    config = {
+        'split': split,
+        'features': list(features),
+        'n_factors': n_factors,
+        'svd_method': svd_method,
+        'k': k,
+        'n_users': n_users,
+        'seed': seed
+    }
+
+    blocks = []
+    try:
+        column_specs = {}
+        for column in RATING_COLUMNS:
+            if column in ratings.columns:
+                block, column_specs[column] = _share(ratings[column].to_numpy())
+                blocks.append(block)
+        block, folds_spec = _share(folds)
+        blocks.append(block)
+
+        n_workers = n_workers or min(n_folds, os.cpu_count() or 1)
+        start = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=n_workers,
+            initializer=_init_worker,
+            initargs=(column_specs, folds_spec, movies, config)
+        ) as pool:
+            results = list(pool.map(_run_fold, range(n_folds)))
+        wall_seconds = time.perf_counter() - start
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+    summary = {}
+    for metric in results[0]['metrics']:
+        values = np.array([result['metrics'][metric] for result in results], dtype=np.float64)
+        summary[metric] = {'mean': float(values.mean()), 'std': float(values.std(ddof=1)) if len(values) > 1 else 0.0}
+
+    return {
+        'split': split,
+        'n_folds': n_folds,
+        'n_workers': n_workers,
+        'wall_seconds': wall_seconds,
+        'folds': results,
+        'summary': summary
+    }